@@ -0,0 +1,288 @@
+"""
+Benchmarks das etapas do pipeline com entradas sintéticas e determinísticas.
+
+Os vídeos são gerados localmente com as fontes de teste do FFmpeg (testsrc2 + tom senoidal) e as
+transcrições são listas de segmentos no formato do Whisper montadas a partir de uma semente fixa,
+então duas execuções na mesma máquina medem exatamente o mesmo trabalho. Por padrão os modelos do
+Hugging Face e o Whisper são substituídos por versões falsas e nada é baixado (--real-models usa os
+modelos do config.json).
+
+Uso:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --sizes small medium --repeat 5
+    python benchmarks/run_benchmarks.py --baseline benchmarks/results/anterior.json
+    python benchmarks/run_benchmarks.py --sizes medium --skip-video --encoder-sweep
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCHMARKS_DIR.parent
+DATA_DIR = BENCHMARKS_DIR / 'data'
+RESULTS_DIR = BENCHMARKS_DIR / 'results'
+
+# Tamanhos das entradas: quantidade de segmentos da transcrição e dimensões/duração do vídeo sintético
+SIZES = {
+    'small': {'segments': 200, 'width': 640, 'height': 360, 'duration': 10},
+    'medium': {'segments': 2000, 'width': 1280, 'height': 720, 'duration': 30},
+    'large': {'segments': 10000, 'width': 1920, 'height': 1080, 'duration': 60},
+}
+
+VOCABULARY = (
+    "video clip people money business market growth story idea team product customer music game "
+    "world future science history health energy power system design camera light sound voice city "
+    "school family friend problem answer question moment reason result chance change today amazing "
+    "great terrible simple important really never always maybe think know feel make take build"
+).split()
+
+SEED = 42
+
+# O main.py e o pacote future são importados a partir da raiz do repositório
+sys.path.insert(0, str(REPO_DIR))
+import main
+
+def canned_segments(count, seed=SEED):
+    """Gera uma transcrição sintética com segmentos no formato retornado pelo Whisper."""
+    rng = random.Random(seed)
+    segments = []
+    start = 0.0
+    for i in range(count):
+        words = [rng.choice(VOCABULARY) for _ in range(rng.randint(4, 18))]
+        duration = round(len(words) * rng.uniform(0.25, 0.45), 2)
+        segments.append({
+            'id': i,
+            'seek': int(start * 100),
+            'start': round(start, 2),
+            'end': round(start + duration, 2),
+            'text': ' ' + ' '.join(words).capitalize() + '.',
+            'tokens': [rng.randint(0, 50000) for _ in words],
+            'temperature': 0.0,
+            'avg_logprob': -0.3,
+            'compression_ratio': 1.4,
+            'no_speech_prob': 0.01,
+        })
+        start += duration + round(rng.uniform(0.0, 0.6), 2)
+    return segments
+
+def synthetic_video(width, height, duration):
+    """Gera (uma única vez) um vídeo de teste com imagem testsrc2 e um tom de 440 Hz, sem fala."""
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    video_path = DATA_DIR / f"testsrc_{width}x{height}_{duration}s.mp4"
+    if not video_path.exists():
+        command = [
+            'ffmpeg', '-y', '-nostdin', '-v', 'error',
+            '-f', 'lavfi', '-i', f"testsrc2=size={width}x{height}:rate=30:duration={duration}",
+            '-f', 'lavfi', '-i', f"sine=frequency=440:sample_rate=44100:duration={duration}",
+            '-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p',
+            '-c:a', 'aac', '-shortest', str(video_path)
+        ]
+        subprocess.run(command, check=True)
+    return video_path
+
+def stub_classifier(texts, batch_size=None, **kwargs):
+    """Classificador falso: rótulo e score derivados do hash do texto, sem rede neural."""
+    if isinstance(texts, str):
+        texts = [texts]
+    results = []
+    for text in texts:
+        digest = hashlib.md5(text.encode('utf-8')).digest()
+        label = 'POSITIVE' if digest[0] % 2 else 'NEGATIVE'
+        results.append({'label': label, 'score': 0.5 + digest[1] / 510})
+    return results
+
+class StubWhisper:
+    """Whisper falso: devolve a transcrição sintética proporcional à duração do áudio recebido."""
+
+    def transcribe(self, audio, **kwargs):
+        seconds = 60 if isinstance(audio, (str, Path)) else len(audio) / main.WHISPER_SAMPLE_RATE
+        return {'segments': [s for s in canned_segments(int(seconds)) if s['end'] <= seconds]}
+
+def install_stub_models():
+    """Substitui os carregadores de modelos do main.py pelas versões falsas."""
+    main.unload_model()
+    main.MODEL_LOADERS.update({
+        'whisper_model': lambda name: StubWhisper(),
+        'sentiment_model': lambda name: stub_classifier,
+        'emotion_model': lambda name: stub_classifier,
+        'ner_model': lambda name: (lambda text: []),
+    })
+
+def measure(function, repeat):
+    """Executa a função repeat vezes e retorna as estatísticas do tempo de parede, em segundos."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return {
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.mean(timings),
+        'runs': timings,
+    }
+
+def clip_subtitles(size, duration, profile_name, work_dir):
+    """Grava as legendas ASS de um clipe do vídeo sintético como o save_clip, no estilo do perfil."""
+    chunks = main.split_transcript_into_segments(main.slice_transcript(canned_segments(duration), 0.0, duration))
+    subtitle_path = work_dir / f"bench_{size}_{profile_name}.ass"
+    return main.write_clip_subtitles(chunks, subtitle_path, main.render_profiles[profile_name]['subtitle_style'])
+
+def text_benchmarks(size, params, work_dir):
+    """Benchmarks das etapas que só dependem da transcrição. Gera (nome, função, arquivo de saída)."""
+    segments = canned_segments(params['segments'])
+    # Mesmas chaves que a análise de sentimento grava nos segmentos (rótulo e score)
+    scored = [dict(segment, sentiment=result['label'], sentiment_score=result['score'])
+              for segment, result in zip(segments, stub_classifier([segment['text'] for segment in segments]))]
+    subtitle_path = work_dir / f"bench_{size}.ass"
+
+    yield 'combine_segments', lambda: main.combine_segments(scored, main.min_duration, main.max_duration), None
+    yield 'extract_topics', lambda: main.extract_topics(segments), None
+    yield 'select_best_segments', lambda: main.select_best_segments(
+        [dict(segment) for segment in segments], main.min_sent_score), None
+    yield 'split_transcript_into_segments', lambda: main.split_transcript_into_segments(segments), None
+    chunks = main.split_transcript_into_segments(segments)
+    yield 'write_clip_subtitles', lambda: main.write_clip_subtitles(chunks, subtitle_path), None
+
+def video_benchmarks(size, params, work_dir):
+    """Benchmarks das etapas que leem ou codificam o vídeo sintético. Gera (nome, função, arquivo de saída)."""
+    video_path = synthetic_video(params['width'], params['height'], params['duration'])
+    duration = params['duration']
+    segment = {'start': 0.0, 'end': float(duration)}
+
+    yield 'compute_clip_focus', lambda: main.compute_clip_focus(video_path, [segment]), None
+
+    # Um benchmark de renderização por perfil de saída, todos a partir do mesmo foco
+    focus = main.compute_clip_focus(video_path, [segment])[0]
+    for name, profile in main.render_profiles.items():
+        crop = main.profile_crop_filter(profile, focus)
+        subtitle_path = clip_subtitles(size, duration, name, work_dir)
+        output_path = work_dir / f"bench_{size}_{name}.mp4"
+        yield f"render_clip_{name}", (lambda crop=crop, subtitle_path=subtitle_path, output_path=output_path,
+                                      profile=profile:
+                                      main.render_clip(video_path, 0.0, duration, crop, subtitle_path, output_path,
+                                                       profile)), output_path
+
+def encoder_benchmarks(size, params, work_dir, presets, crfs):
+    """
+    Varredura das opções do x264: renderiza o mesmo clipe no perfil padrão com cada preset e CRF,
+    para comparar velocidade e tamanho do arquivo. Gera (nome, função, arquivo de saída).
+    """
+    video_path = synthetic_video(params['width'], params['height'], params['duration'])
+    duration = params['duration']
+    subtitle_path = clip_subtitles(size, duration, main.default_formats[0], work_dir)
+
+    base_profile = main.render_profiles[main.default_formats[0]]
+    focus = main.compute_clip_focus(video_path, [{'start': 0.0, 'end': float(duration)}])[0]
+    crop = main.profile_crop_filter(base_profile, focus)
+    for preset in presets:
+        for crf in crfs:
+            profile = dict(base_profile, preset=preset, crf=crf, video_bitrate='')
+            output_path = work_dir / f"bench_{size}_{preset}_crf{crf}.mp4"
+            yield f"encode_{preset}_crf{crf}", (lambda profile=profile, output_path=output_path:
+                                               main.render_clip(video_path, 0.0, duration, crop, subtitle_path,
+                                                                output_path, profile)), output_path
+
+def git_commit():
+    """Retorna o commit atual do repositório, para identificar os resultados."""
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                                capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (subprocess.CalledProcessError, OSError):
+        return None
+
+def compare(results, baseline_path):
+    """Mostra a variação da mediana de cada benchmark em relação a um resultado anterior."""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {(r['benchmark'], r['size']): r['median'] for r in json.load(f)['results']}
+    for result in results:
+        previous = baseline.get((result['benchmark'], result['size']))
+        if previous:
+            change = (result['median'] - previous) / previous * 100
+            print(f"  {result['benchmark']:<32} {result['size']:<8} {previous:9.4f}s -> "
+                  f"{result['median']:9.4f}s ({change:+.1f}%)")
+
+def parse_args(argv=None):
+    """Lê os argumentos de linha de comando."""
+    parser = argparse.ArgumentParser(description="Benchmarks das etapas do pipeline com entradas sintéticas.")
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=list(SIZES),
+                        help="Tamanhos das entradas a medir.")
+    parser.add_argument('--repeat', type=int, default=3, help="Execuções de cada benchmark.")
+    parser.add_argument('--only', nargs='+', help="Mede apenas os benchmarks com estes nomes.")
+    parser.add_argument('--skip-video', action='store_true',
+                        help="Não mede as etapas que leem ou codificam vídeo.")
+    parser.add_argument('--encoder-sweep', action='store_true',
+                        help="Mede também a velocidade e o tamanho do clipe para cada preset e CRF do x264.")
+    parser.add_argument('--presets', nargs='+', default=['ultrafast', 'superfast', 'veryfast', 'faster', 'fast', 'medium'],
+                        help="Presets do x264 na varredura do encoder.")
+    parser.add_argument('--crfs', nargs='+', type=int, default=[20, 23, 26], help="Valores de CRF na varredura do encoder.")
+    parser.add_argument('--real-models', action='store_true',
+                        help="Usa os modelos configurados no config.json em vez dos modelos falsos.")
+    parser.add_argument('--output', type=Path, help="Arquivo JSON de saída (padrão: benchmarks/results/<data>.json).")
+    parser.add_argument('--baseline', type=Path, help="Resultado anterior para comparação.")
+    return parser.parse_args(argv)
+
+def run(args):
+    """Executa os benchmarks selecionados e grava os resultados em JSON."""
+    if not args.real_models:
+        install_stub_models()
+
+    work_dir = DATA_DIR / 'work'
+    work_dir.mkdir(parents=True, exist_ok=True)
+
+    results = []
+    for size in args.sizes:
+        params = SIZES[size]
+        suites = [text_benchmarks(size, params, work_dir)]
+        if not args.skip_video:
+            suites.append(video_benchmarks(size, params, work_dir))
+            if args.encoder_sweep:
+                suites.append(encoder_benchmarks(size, params, work_dir, args.presets, args.crfs))
+        for suite in suites:
+            for name, function, output_path in suite:
+                if args.only and name not in args.only:
+                    continue
+                main.reset_topic_model()
+                stats = measure(function, args.repeat)
+                result = {'benchmark': name, 'size': size, 'params': params, 'repeat': args.repeat, **stats}
+                message = f"{name:<32} {size:<8} mediana {stats['median']:.4f}s (mín. {stats['min']:.4f}s)"
+                if output_path is not None and output_path.exists():
+                    # Para as codificações: tamanho do arquivo e velocidade em relação ao tempo real
+                    result['output_bytes'] = output_path.stat().st_size
+                    result['realtime_factor'] = params['duration'] / stats['median']
+                    message += f" | {result['output_bytes'] / 1024:.0f} KiB | {result['realtime_factor']:.2f}x tempo real"
+                results.append(result)
+                print(message, flush=True)
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'stub_models': not args.real_models,
+        'seed': SEED,
+        'results': results,
+    }
+    output_path = args.output or RESULTS_DIR / f"{datetime.now().strftime('%Y%m%d%H%M%S')}.json"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Resultados salvos em: {output_path}")
+
+    if args.baseline:
+        print(f"Comparação com {args.baseline}:")
+        compare(results, args.baseline)
+
+if __name__ == "__main__":
+    run(parse_args())
@@ -0,0 +1,251 @@
+"""
+Backend HTTP do KubeCut (FastAPI), usado pelo frontend em future/frontend.
+
+O upload é gravado em disco em blocos, sem carregar o vídeo inteiro na memória. O /process-video/
+apenas coloca o job na fila e devolve o job_id na hora; um pool de workers, que mantém os modelos
+carregados durante toda a vida do serviço, processa os jobs com as etapas do main.py. O andamento
+pode ser consultado em /jobs/{job_id} ou acompanhado por Server-Sent Events em /jobs/{job_id}/events.
+
+Uso (a partir da raiz do repositório):
+    uvicorn future.backend.app:app --host 127.0.0.1 --port 8001
+"""
+import asyncio
+import json
+import logging
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+REPO_DIR = Path(__file__).resolve().parents[3]
+
+sys.path.insert(0, str(REPO_DIR))
+import main
+from future.checkpoint.checkpoint import completed_clips
+
+service_config = main.config['service']
+UPLOAD_DIR = main.VIDEOS_DIR / 'uploads'
+UPLOAD_EXTENSIONS = ('.mp4', '.mov', '.mkv', '.avi')
+
+# Estado dos jobs do serviço, atualizado pelos workers e lido pelos endpoints
+jobs = {}
+_job_queue = None
+_workers = []
+_executor = None
+
+class ProcessRequest(BaseModel):
+    video_path: str
+    output_format: str = 'tiktok'
+
+def parse_formats(output_format):
+    """
+    Converte output_format (um perfil ou vários separados por vírgula, por exemplo "tiktok,youtube")
+    na lista de perfis, respondendo 400 se algum não existir em output_formats.profiles.
+    """
+    formats = [name.strip() for name in output_format.split(',') if name.strip()]
+    unknown = [name for name in formats if name not in main.render_profiles]
+    if not formats or unknown:
+        raise HTTPException(status_code=400, detail=f"Formato de saída desconhecido: {output_format}")
+    return formats
+
+def job_progress(record):
+    """Calcula o progresso do job (0 a 1), contando os clipes já renderizados no checkpoint do job."""
+    if record['status'] in ('done', 'error'):
+        return 1.0
+    if record['status'] != 'rendering' or not record['clips_total']:
+        return {'queued': 0.0, 'analyzing': 0.1, 'rendering': 0.5}[record['status']]
+    done = len(completed_clips(record['checkpoint_dir']))
+    return 0.5 + 0.5 * done / (record['clips_total'] * len(record['formats']))
+
+def job_status(record):
+    """Resposta pública do job: estado, progresso e, ao final, os clipes gerados ou o erro."""
+    return {
+        'job_id': record['job_id'],
+        'status': record['status'],
+        'progress': round(job_progress(record), 3),
+        'video_path': record['video_path'],
+        'output_format': record['output_format'],
+        'formats': record['formats'],
+        'output_folder': record['output_folder'],
+        'clips_total': record['clips_total'],
+        'clips': record['clips'],
+        'error': record['error'],
+    }
+
+def run_job(record):
+    """Executa as etapas de análise e renderização de um job em uma thread do pool."""
+    # Os service.workers jobs do serviço podem renderizar ao mesmo tempo e dividem as threads do FFmpeg
+    job = main.create_job(record['video_path'], record['job_id'], record['formats'], service_config['workers'])
+    record['checkpoint_dir'] = job['checkpoint_dir']
+
+    record['status'] = 'analyzing'
+    main.analyze_video(job)
+    record['clips_total'] = len(job['selected_segments'])
+
+    record['status'] = 'rendering'
+    main.render_video(job)
+    main.report_throughput(job)
+
+    record['clips'] = [str(clip_path) for clip_path in job['clips_saved']]
+    record['error'] = job['error']
+    record['status'] = 'error' if job['error'] else 'done'
+
+async def worker(name):
+    """Consome a fila de jobs, executando cada um no pool de threads que mantém os modelos carregados."""
+    loop = asyncio.get_running_loop()
+    while True:
+        record = await _job_queue.get()
+        try:
+            await loop.run_in_executor(_executor, run_job, record)
+        except Exception as e:
+            logging.error(f"Erro no job {record['job_id']} ({name}): {e}")
+            record['error'] = str(e)
+            record['status'] = 'error'
+        finally:
+            _job_queue.task_done()
+
+def preload_models():
+    """Carrega os modelos uma única vez, antes do primeiro job."""
+    for model_key in ('whisper_model', 'sentiment_model'):
+        main.get_model(model_key)
+
+async def start_workers():
+    """Cria a fila de jobs e o pool de workers."""
+    global _job_queue, _executor
+    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    _job_queue = asyncio.Queue(maxsize=service_config['queue_size'])
+    _executor = ThreadPoolExecutor(max_workers=service_config['workers'], thread_name_prefix='job')
+    if service_config['preload_models']:
+        await asyncio.get_running_loop().run_in_executor(_executor, preload_models)
+    _workers.extend(asyncio.create_task(worker(f"worker-{i + 1}")) for i in range(service_config['workers']))
+    logging.info(f"Serviço iniciado com {service_config['workers']} worker(s)")
+
+async def stop_workers():
+    """Encerra os workers; jobs interrompidos podem ser retomados pelos checkpoints."""
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _executor.shutdown(wait=False)
+
+@asynccontextmanager
+async def lifespan(app):
+    """Inicia os workers antes da primeira requisição e os encerra junto com o serviço."""
+    await start_workers()
+    try:
+        yield
+    finally:
+        await stop_workers()
+
+app = FastAPI(title="KubeCut", lifespan=lifespan)
+
+@app.post("/upload-video/")
+async def upload_video(file: UploadFile = File(...), output_format: str = Form('tiktok')):
+    """Recebe o vídeo e o grava em disco em blocos, devolvendo o caminho salvo."""
+    filename = Path(file.filename or '').name
+    if Path(filename).suffix.lower() not in UPLOAD_EXTENSIONS:
+        raise HTTPException(status_code=400, detail="Tipo de arquivo não permitido.")
+    parse_formats(output_format)
+
+    file_path = UPLOAD_DIR / f"{uuid.uuid4().hex[:8]}_{filename}"
+    chunk_size = service_config['upload_chunk_size_kb'] * 1024
+    loop = asyncio.get_running_loop()
+    size = 0
+    try:
+        with open(file_path, 'wb') as f:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                # A escrita em disco roda fora do event loop para não travar as outras requisições
+                await loop.run_in_executor(None, f.write, chunk)
+                size += len(chunk)
+    except OSError as e:
+        if file_path.exists():
+            file_path.unlink()
+        logging.error(f"Erro ao salvar o upload {filename}: {e}")
+        raise HTTPException(status_code=500, detail="Erro ao salvar o vídeo.")
+    finally:
+        await file.close()
+
+    logging.info(f"Upload salvo em: {file_path} ({size} bytes)")
+    return {'file_path': str(file_path), 'size': size, 'output_format': output_format}
+
+@app.post("/process-video/")
+async def process_video(request: ProcessRequest):
+    """Coloca o vídeo na fila de processamento e devolve o job_id sem esperar o processamento."""
+    # Só processa vídeos recebidos por /upload-video/, nunca outros arquivos do servidor
+    video_path = Path(request.video_path).resolve()
+    if not video_path.is_relative_to(UPLOAD_DIR.resolve()):
+        raise HTTPException(status_code=403, detail="O vídeo precisa ter sido enviado por /upload-video/.")
+    if not video_path.is_file():
+        raise HTTPException(status_code=404, detail=f"Vídeo não encontrado: {request.video_path}")
+    formats = parse_formats(request.output_format)
+    if _job_queue.full():
+        raise HTTPException(status_code=503, detail="Fila de processamento cheia, tente novamente mais tarde.")
+
+    job_id = main.generate_unique_id()
+    record = {
+        'job_id': job_id,
+        'status': 'queued',
+        'video_path': str(video_path),
+        'output_format': request.output_format,
+        'formats': formats,
+        'output_folder': str(main.CLIPS_DIR / f"{video_path.stem}_{job_id}"),
+        'checkpoint_dir': None,
+        'clips_total': 0,
+        'clips': [],
+        'error': None,
+        'created': time.time(),
+    }
+    jobs[job_id] = record
+    _job_queue.put_nowait(record)
+    logging.info(f"Job {job_id} na fila para o vídeo {video_path}")
+    return {
+        'job_id': job_id,
+        'message': f"Vídeo na fila de processamento (job {job_id}).",
+        'status_url': f"/jobs/{job_id}",
+        'events_url': f"/jobs/{job_id}/events",
+        'output_folder': record['output_folder'],
+    }
+
+def get_record(job_id):
+    """Retorna o job ou responde 404."""
+    record = jobs.get(job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Job não encontrado: {job_id}")
+    return record
+
+@app.get("/jobs")
+async def list_jobs():
+    """Lista os jobs do serviço, do mais recente para o mais antigo."""
+    records = sorted(jobs.values(), key=lambda record: record['created'], reverse=True)
+    return [job_status(record) for record in records]
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Estado e progresso de um job (polling)."""
+    return job_status(get_record(job_id))
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Envia o estado do job por Server-Sent Events sempre que ele muda, até o job terminar."""
+    record = get_record(job_id)
+
+    async def events():
+        last = None
+        while True:
+            status = job_status(record)
+            if status != last:
+                yield f"data: {json.dumps(status, ensure_ascii=False)}\n\n"
+                last = status
+            if status['status'] in ('done', 'error'):
+                break
+            await asyncio.sleep(service_config['events_interval_seconds'])
+
+    return StreamingResponse(events(), media_type='text/event-stream')
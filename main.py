@@ -2,61 +2,106 @@ import sys
 import os
 import logging
 import re
+import time
+import argparse
 from datetime import datetime
 import cv2
 import numpy as np
-import moviepy.editor as mp
-import whisper
-from transformers import pipeline, BertForTokenClassification, BertTokenizer
 from sklearn.feature_extraction.text import CountVectorizer
 from sklearn.decomposition import LatentDirichletAllocation
 from pathlib import Path
 import json
 import warnings
-from transformers import logging as hf_logging
+import threading
+import gc
+import hashlib
+import uuid
+import bisect
+import itertools
+import queue
 import subprocess
-import shutil
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
 import pysrt
+try:
+    import resource  # Não existe no Windows
+except ImportError:
+    resource = None
+from future.checkpoint.checkpoint import (
+    write_json_atomic, checkpoint_dir, save_stage, load_stage, clip_key, completed_clips, mark_clip_done
+)
 
 # Supressão de avisos da biblioteca transformers
-hf_logging.set_verbosity_error()
 warnings.filterwarnings("ignore", category=UserWarning, module="transformers")
 
+# Caminho base do projeto
+BASE_DIR = Path(__file__).resolve().parent
+
 def load_config():
-    """Carrega as configurações do arquivo JSON."""
-    with open('config.json', 'r') as f:
+    """Carrega as configurações do config.json na raiz do projeto, independente do diretório atual."""
+    with open(BASE_DIR / 'config.json', 'r') as f:
         return json.load(f)
 
 # Carregar as configurações
 config = load_config()
 
-# Caminho base do projeto
-BASE_DIR = Path(__file__).resolve().parent
-
 # Diretórios
 SUBTITLE_DIR = BASE_DIR / config['directories']['subtitles']
 CLIPS_DIR = BASE_DIR / config['directories']['clips']
 LOGS_DIR = BASE_DIR / config['directories']['logs']['dir']
 VIDEOS_DIR = BASE_DIR / config['directories']['videos']
 AUDIO_DIR = BASE_DIR / config['directories']['audio']
+CACHE_DIR = BASE_DIR / config['directories']['cache']
+CHECKPOINTS_DIR = BASE_DIR / config['directories']['checkpoints']
+TRANSCRIPT_CACHE_DIR = CACHE_DIR / 'transcripts'
+SCENE_CACHE_DIR = CACHE_DIR / 'scenes'
+
+# Extensões de vídeo aceitas no modo em lote (as mesmas do start.sh)
+VIDEO_EXTENSIONS = ('.mp4', '.mov')
 
 # Parametros
 num_topics = config['video_processing']['num_topics']
 num_keywords = config['video_processing']['num_keywords']
 min_duration = config['video_processing']['min_duration']
 max_duration = config['video_processing']['max_duration']
+sentiment_batch_size = config['video_processing']['sentiment_batch_size']
+topics_learning_method = config['video_processing']['topics_learning_method']
+selection_strategy = config['video_processing']['selection_strategy']
+emotion_weight = config['video_processing']['emotion_weight']
 max_words_per_segment = config['max_words_per_segment']
 font_file = config['font_file']
-
-# Carregar o modelo Whisper do config.json
-whisper_model = whisper.load_model(config['whisper_model'])
+retranscribe_clips = config['subtitles']['retranscribe_clips']
+subtitle_max_pause = config['subtitles']['max_pause_seconds']
+subtitle_font_name = config['subtitles']['font_name']
+save_srt = config['subtitles']['save_srt']
+# Tempos por palavra ligados por padrão: as legendas usam os tempos reais em vez de interpolação
+whisper_options = {'word_timestamps': True, **config['whisper_options']}
+streaming_config = config['streaming_transcription']
+render_workers = config['render']['workers']
+render_profiles = config['output_formats']['profiles']
+encoder_config = config['encoder']
+default_formats = config['output_formats']['default']
+pipeline_config = config['pipeline']
+face_tracking_enabled = config['face_tracking']['enabled']
+face_tracking_fps = config['face_tracking']['sample_fps']
+face_tracking_smoothing = config['face_tracking']['smoothing']
+face_tracking_min_shift = config['face_tracking']['min_shift_px']
+face_detection_config = config['face_detection']
+scene_detection_config = config['scene_detection']
+transcript_cache_enabled = config['transcript_cache']['enabled']
+transcript_cache_max_bytes = config['transcript_cache']['max_size_mb'] * 1024 * 1024
+instrumentation_config = config['instrumentation']
+
+# Taxa de amostragem esperada pelo Whisper
+WHISPER_SAMPLE_RATE = 16000
 
 # Carregar o score minimo no sentimento do config.json
 min_sent_score = config['video_processing']['min_sentiment_score']
 
 def ensure_directories_exist():
     """Garante que as pastas necessárias existam antes de configurar o logging."""
-    directories = [SUBTITLE_DIR, CLIPS_DIR, LOGS_DIR, VIDEOS_DIR, AUDIO_DIR]
+    directories = [SUBTITLE_DIR, CLIPS_DIR, LOGS_DIR, VIDEOS_DIR, AUDIO_DIR, TRANSCRIPT_CACHE_DIR, SCENE_CACHE_DIR, CHECKPOINTS_DIR]
     for directory in directories:
         directory.mkdir(parents=True, exist_ok=True)
 
@@ -70,128 +115,570 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-# Inicializa os pipelines com base nas configurações
+# Variáveis de ambiente usadas pelos pipelines e arquivos temporários
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 os.environ['TEMP'] = str(AUDIO_DIR)
 os.environ['TMPDIR'] = str(AUDIO_DIR)
 os.environ['TMP'] = str(AUDIO_DIR)
-sentiment_analyzer = pipeline("sentiment-analysis", model=config['sentiment_model'])
-emotion_analyzer = pipeline("text-classification", model=config['emotion_model'])
-
-# Carrega o modelo de NER
-ner_model = BertForTokenClassification.from_pretrained(
-    config['ner_model'],
-    ignore_mismatched_sizes=True
-)
-
-# Carrega o tokenizer correspondente ao modelo NER
-ner_tokenizer = BertTokenizer.from_pretrained(config['ner_model'])
 
-# Inicializa o pipeline de NER
-ner_analyzer = pipeline("ner", model=ner_model, tokenizer=ner_tokenizer, aggregation_strategy="simple")
+# Métricas acumuladas por etapa durante a execução do processo
+# Sufixo aleatório para que processos iniciados no mesmo segundo não gravem o mesmo relatório
+RUN_ID = f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}"
+_run_started = time.perf_counter()
+_stage_stats = {}
+_run_jobs = []
+_stage_stats_lock = threading.Lock()
+
+def peak_rss_bytes():
+    """Retorna o pico de memória residente do processo até agora, ou None se o módulo resource não existir."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # Linux informa em KiB, macOS em bytes
+
+def children_cpu_seconds():
+    """Retorna o tempo de CPU dos subprocessos já finalizados (FFmpeg), ou 0 sem o módulo resource."""
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+@contextmanager
+def measure_stage(stage, items=0):
+    """
+    Mede uma execução da etapa: tempo de parede, CPU do processo, CPU dos subprocessos, memória e
+    itens processados. O bloco pode atualizar a quantidade de itens em sample['items'].
+    A memória vem do ru_maxrss do processo: peak_rss_bytes é o pico do processo ao fim da etapa e
+    peak_rss_growth_bytes é quanto esse pico subiu durante a etapa, o que mostra qual etapa o elevou.
+    Com etapas rodando em paralelo, CPU e memória são do processo inteiro e podem se sobrepor entre elas.
+    """
+    sample = {'items': items}
+    if not instrumentation_config['enabled']:
+        yield sample
+        return
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    children_start = children_cpu_seconds()
+    peak_start = peak_rss_bytes()
+    failed = False
+    try:
+        yield sample
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        children = children_cpu_seconds() - children_start
+        peak = peak_rss_bytes()
+        with _stage_stats_lock:
+            stats = _stage_stats.setdefault(stage, {
+                'calls': 0, 'errors': 0, 'items': 0, 'wall_seconds': 0.0,
+                'cpu_seconds': 0.0, 'children_cpu_seconds': 0.0,
+                'peak_rss_bytes': None, 'peak_rss_growth_bytes': None
+            })
+            stats['calls'] += 1
+            stats['errors'] += int(failed)
+            stats['items'] += sample['items']
+            stats['wall_seconds'] += wall
+            stats['cpu_seconds'] += cpu
+            stats['children_cpu_seconds'] += children
+            if peak is not None:
+                stats['peak_rss_bytes'] = max(stats['peak_rss_bytes'] or 0, peak)
+                stats['peak_rss_growth_bytes'] = (stats['peak_rss_growth_bytes'] or 0) + peak - peak_start
+
+def record_job(job, elapsed, duration):
+    """Adiciona o resumo de um job ao relatório da execução."""
+    with _stage_stats_lock:
+        _run_jobs.append({
+            'video_path': job['video_path'],
+            'job_id': job['unique_id'],
+            'elapsed_seconds': elapsed,
+            'video_seconds': duration,
+            'clips': len(job['clips_saved']),
+            'error': job['error']
+        })
+
+def prometheus_metrics(stages, peak_rss=None):
+    """Formata as métricas das etapas e o pico de memória do processo no formato de texto do Prometheus."""
+    memory_metrics = [
+        ('peak_rss_growth_bytes', 'kubecut_stage_peak_rss_growth_bytes_total', 'counter',
+         'Quanto o pico de memória residente do processo subiu durante a etapa, em bytes'),
+        ('peak_rss_bytes', 'kubecut_stage_peak_rss_bytes', 'gauge',
+         'Pico de memória residente do processo ao fim da etapa, em bytes'),
+    ]
+    metrics = [
+        ('calls', 'Execuções da etapa'),
+        ('errors', 'Execuções da etapa que terminaram em erro'),
+        ('items', 'Itens processados pela etapa'),
+        ('wall_seconds', 'Tempo de parede da etapa, em segundos'),
+        ('cpu_seconds', 'Tempo de CPU do processo durante a etapa, em segundos'),
+        ('children_cpu_seconds', 'Tempo de CPU dos subprocessos durante a etapa, em segundos'),
+    ]
+    lines = []
+    for key, description in metrics:
+        name = f"kubecut_stage_{key}_total"
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} counter"]
+        lines += [f'{name}{{stage="{stage}"}} {stats[key]}' for stage, stats in sorted(stages.items())]
+    for key, name, metric_type, description in memory_metrics:
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} {metric_type}"]
+        lines += [f'{name}{{stage="{stage}"}} {stats[key]}'
+                  for stage, stats in sorted(stages.items()) if stats[key] is not None]
+    if peak_rss is not None:
+        lines += ["# HELP kubecut_process_peak_rss_bytes Pico de memória residente do processo desde o início",
+                  "# TYPE kubecut_process_peak_rss_bytes gauge",
+                  f"kubecut_process_peak_rss_bytes {peak_rss}"]
+    return "\n".join(lines) + "\n"
+
+def write_run_report():
+    """
+    Grava o relatório JSON da execução (logs/run_<id>.json) com as métricas de cada etapa e o resumo
+    dos jobs e, se instrumentation.prometheus_file estiver configurado, as mesmas métricas no formato do Prometheus.
+    """
+    if not instrumentation_config['enabled']:
+        return
+    with _stage_stats_lock:
+        stages = {stage: dict(stats) for stage, stats in _stage_stats.items()}
+        jobs = list(_run_jobs)
+
+    report = {
+        'run_id': RUN_ID,
+        'wall_seconds': time.perf_counter() - _run_started,
+        'peak_rss_bytes': peak_rss_bytes(),
+        'stages': stages,
+        'jobs': jobs
+    }
+    report_path = LOGS_DIR / f"run_{RUN_ID}.json"
+    try:
+        write_json_atomic(report_path, report)
+        logging.info(f"Relatório da execução salvo em: {report_path}")
+
+        if instrumentation_config['prometheus_file']:
+            metrics_path = BASE_DIR / instrumentation_config['prometheus_file']
+            temp_path = metrics_path.with_name(f"{metrics_path.name}.{os.getpid()}.tmp")
+            temp_path.write_text(prometheus_metrics(stages, report['peak_rss_bytes']), encoding='utf-8')
+            os.replace(temp_path, metrics_path)  # Nunca expor um arquivo pela metade ao coletor
+    except OSError as e:
+        logging.error(f"Erro ao salvar o relatório da execução: {e}")
+
+def _load_transformers_pipeline(task, model_name):
+    """Cria um pipeline do transformers, importando a biblioteca apenas quando necessário."""
+    from transformers import pipeline, logging as hf_logging
+    hf_logging.set_verbosity_error()
+    return pipeline(task, model=model_name)
+
+def _load_whisper_model(model_name):
+    """Carrega o modelo Whisper."""
+    import whisper
+    return whisper.load_model(model_name)
+
+def _load_ner_pipeline(model_name):
+    """Carrega o modelo de NER, o tokenizer correspondente e monta o pipeline."""
+    from transformers import pipeline, BertForTokenClassification, BertTokenizer, logging as hf_logging
+    hf_logging.set_verbosity_error()
+    ner_model = BertForTokenClassification.from_pretrained(model_name, ignore_mismatched_sizes=True)
+    ner_tokenizer = BertTokenizer.from_pretrained(model_name)
+    return pipeline("ner", model=ner_model, tokenizer=ner_tokenizer, aggregation_strategy="simple")
+
+# Registro de modelos carregados sob demanda, indexado pelas chaves de modelo do config.json
+MODEL_LOADERS = {
+    'whisper_model': _load_whisper_model,
+    'sentiment_model': lambda name: _load_transformers_pipeline("sentiment-analysis", name),
+    'emotion_model': lambda name: _load_transformers_pipeline("text-classification", name),
+    'ner_model': _load_ner_pipeline,
+}
+_loaded_models = {}
+_models_lock = threading.Lock()
+
+# O Whisper é compartilhado entre as threads de renderização; as transcrições são serializadas
+_whisper_lock = threading.Lock()
+
+def get_model(key):
+    """Retorna o modelo configurado em config[key], carregando-o no primeiro uso e compartilhando-o depois."""
+    with _models_lock:
+        if key not in _loaded_models:
+            started = time.perf_counter()
+            _loaded_models[key] = MODEL_LOADERS[key](config[key])
+            logging.info(f"Modelo '{config[key]}' ({key}) carregado em {time.perf_counter() - started:.1f}s")
+        return _loaded_models[key]
+
+def unload_model(key=None):
+    """Libera da memória um modelo carregado, ou todos eles quando key é None."""
+    with _models_lock:
+        keys = list(_loaded_models) if key is None else [key]
+        for model_key in keys:
+            if _loaded_models.pop(model_key, None) is not None:
+                logging.info(f"Modelo '{config[model_key]}' ({model_key}) descarregado")
+    gc.collect()
 
 def clean_text(text):
     """Remove caracteres especiais e limpa o texto.""" 
     return re.sub(r'\s+', ' ', text).strip()
 
-def extract_audio(video_path, audio_output_path):
-    """Extrai o áudio de um vídeo e salva em um arquivo temporário na pasta de áudio."""  
-    logging.info(f"Extraindo áudio do vídeo: {video_path}")
+def load_audio(video_path, start_time=None, end_time=None, sample_rate=WHISPER_SAMPLE_RATE):
+    """
+    Decodifica o áudio do vídeo com o FFmpeg direto para PCM mono (s16le) em memória e
+    retorna um array float32 normalizado, no formato esperado pelo Whisper, sem arquivo intermediário.
+    """
+    command = ['ffmpeg', '-nostdin', '-v', 'error']
+    if start_time is not None:
+        command += ['-ss', f"{start_time:.3f}"]
+        if end_time is not None:
+            command += ['-t', f"{end_time - start_time:.3f}"]
+    command += ['-i', str(video_path), '-vn', '-ac', '1', '-ar', str(sample_rate), '-f', 's16le', '-']
+
+    logging.info(f"Decodificando áudio do vídeo para PCM {sample_rate} Hz: {video_path}")
     try:
-        video = mp.VideoFileClip(str(video_path))
-        audio = video.audio
-        
-        # Especificar o caminho de saída para o arquivo de áudio
-        audio.write_audiofile(str(audio_output_path), codec='mp3')  # Salvar na pasta de áudio
-        logging.info(f"Áudio extraído e salvo em: {audio_output_path}")
-    except Exception as e:
-        logging.error(f"Erro ao extrair áudio: {e}")
+        with measure_stage('extract_audio', 1):
+            result = subprocess.run(command, capture_output=True, check=True)
+    except subprocess.CalledProcessError as e:
+        logging.error(f"Erro ao decodificar o áudio: {e.stderr.decode(errors='ignore').strip()}")
         raise
 
+    return np.frombuffer(result.stdout, np.int16).astype(np.float32) / 32768.0
 
-def transcribe_audio(audio_path):
-    """Transcreve o áudio utilizando o modelo Whisper."""    
-    logging.info(f"Iniciando a transcrição do áudio: {audio_path}")
+def transcribe_audio(audio):
+    """Transcreve o áudio (caminho de arquivo ou array PCM de 16 kHz) utilizando o modelo Whisper."""    
+    description = audio if isinstance(audio, (str, Path)) else f"{len(audio) / WHISPER_SAMPLE_RATE:.1f}s de PCM em memória"
+    logging.info(f"Iniciando a transcrição do áudio: {description}")
     try:
-        result = whisper_model.transcribe(audio_path, verbose=True)
+        whisper_model = get_model('whisper_model')
+        with _whisper_lock, measure_stage('transcribe_audio') as stage:
+            result = whisper_model.transcribe(audio, verbose=True, **whisper_options)
+            stage['items'] = len(result["segments"])
         logging.info("Transcrição concluída com sucesso")
-        return result["segments"]
+        return [compact_word_timestamps(segment) for segment in result["segments"]]
     except Exception as e:
         logging.error(f"Erro ao transcrever o áudio: {e}")
         raise
 
-def format_time(seconds):
-    """Converte tempo em segundos para o formato SRT (HH:MM:SS,mmm)."""
-    millisec = int((seconds - int(seconds)) * 1000)
-    total_seconds = int(seconds)
-    hours, remainder = divmod(total_seconds, 3600)
-    minutes, seconds = divmod(remainder, 60)
-    return f"{hours:02}:{minutes:02}:{seconds:02},{millisec:03}"
-
-def generate_unique_id():
-    """Gera um ID único baseado no timestamp."""    
-    return datetime.now().strftime("%Y%m%d%H%M%S")
-    
-def save_subtitles(segments, output_dir, unique_id, video_name):
-    """Salva os segmentos transcritos como arquivos SRT na pasta subtitles."""
-    subtitles_subfolder = output_dir / f"{video_name}_{unique_id}"
-    subtitles_subfolder.mkdir(parents=True, exist_ok=True)
-
-    logging.info(f"Salvando legendas em: {subtitles_subfolder}")
-
-    for i, segment in enumerate(segments):
-        subtitle_filename = f"{video_name}_{unique_id}_{i + 1}.srt"
-        subtitle_path = subtitles_subfolder / subtitle_filename
-
-        logging.info(f"Salvando a transcrição como legenda em: {subtitle_path}")
+def compact_word_timestamps(segment):
+    """
+    Troca a lista de palavras do Whisper (um dict por palavra) por listas paralelas:
+    words (texto), word_starts e word_ends (segundos). Segmentos sem tempos por palavra ficam como estão.
+    """
+    word_items = segment.pop('words', None)
+    if not word_items:
+        return segment
+    segment['words'] = [item['word'].strip() for item in word_items]
+    segment['word_starts'] = [float(item['start']) for item in word_items]
+    segment['word_ends'] = [float(item['end']) for item in word_items]
+    return segment
+
+def segment_word_times(segment):
+    """
+    Retorna (palavras, inícios, fins) do segmento. Usa os tempos por palavra do Whisper quando existem;
+    em transcrições antigas, sem eles, interpola linearmente pela posição da palavra no segmento.
+    """
+    if segment.get('word_starts'):
+        return segment['words'], segment['word_starts'], segment['word_ends']
+
+    words = segment['text'].strip().split()
+    if not words:
+        return [], [], []
+    start_time = segment['start']
+    word_duration = (segment['end'] - start_time) / len(words)
+    starts = [start_time + i * word_duration for i in range(len(words))]
+    return words, starts, [word_start + word_duration for word_start in starts]
+
+def iter_audio_windows(video_path, window_seconds, overlap_seconds, sample_rate=WHISPER_SAMPLE_RATE):
+    """
+    Lê o áudio do vídeo por um pipe do FFmpeg (PCM mono s16le) em janelas sobrepostas, sem carregar o
+    arquivo inteiro. Gera (início da janela em segundos, array float32, se é a última janela).
+    """
+    command = ['ffmpeg', '-nostdin', '-v', 'error', '-i', str(video_path),
+               '-vn', '-ac', '1', '-ar', str(sample_rate), '-f', 's16le', '-']
+    window_samples = int(window_seconds * sample_rate)
+    step_samples = window_samples - int(overlap_seconds * sample_rate)
+    if step_samples <= 0:
+        raise ValueError("A sobreposição precisa ser menor que a janela de transcrição.")
+
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    buffer = np.zeros(0, np.float32)
+    offset = 0  # Posição, em amostras, do início do buffer no áudio completo
+    try:
+        while True:
+            needed_bytes = (window_samples - len(buffer)) * 2
+            data = process.stdout.read(needed_bytes)
+            data = data[:len(data) - len(data) % 2]
+            buffer = np.concatenate([buffer, np.frombuffer(data, np.int16).astype(np.float32) / 32768.0])
+            is_last = len(data) < needed_bytes
+            if len(buffer):
+                yield offset / sample_rate, buffer, is_last
+            if is_last:
+                break
+            buffer = buffer[step_samples:]
+            offset += step_samples
+    finally:
+        process.stdout.close()
+        if process.poll() is None:
+            process.kill()
+        process.wait()
 
+def trim_segment_before(segment, cutoff):
+    """
+    Remove do segmento as palavras que começam antes de cutoff (segundos), ajustando início e texto.
+    Sem tempos por palavra, usa a interpolação de segment_word_times. Retorna None se não sobrar palavra.
+    """
+    words, word_starts, word_ends = segment_word_times(segment)
+    keep = [i for i, word_start in enumerate(word_starts) if word_start >= cutoff - 0.01]
+    if not keep:
+        return None
+    trimmed = {**segment, 'start': word_starts[keep[0]], 'text': ' '.join(words[i] for i in keep)}
+    if segment.get('word_starts'):
+        trimmed['words'] = [words[i] for i in keep]
+        trimmed['word_starts'] = [word_starts[i] for i in keep]
+        trimmed['word_ends'] = [word_ends[i] for i in keep]
+    return trimmed
+
+def transcribe_audio_stream(video_path, window_seconds=None, overlap_seconds=None):
+    """
+    Transcreve o vídeo em janelas sobrepostas e gera os segmentos à medida que cada janela termina,
+    com tempos absolutos. Nas emendas, cada janela fica com os segmentos que começam antes da metade
+    da sobreposição; dos segmentos que cruzam o fim do que a janela anterior já emitiu, só as palavras
+    seguintes são mantidas. A memória usada não depende da duração do vídeo.
+    """
+    window_seconds = window_seconds or streaming_config['window_seconds']
+    overlap_seconds = streaming_config['overlap_seconds'] if overlap_seconds is None else overlap_seconds
+    last_end = 0.0
+    segment_id = 0
+    for window_start, audio, is_last in iter_audio_windows(video_path, window_seconds, overlap_seconds):
+        window_end = window_start + len(audio) / WHISPER_SAMPLE_RATE
+        seam = window_end - overlap_seconds / 2
+        for segment in transcribe_audio(audio):
+            start = segment['start'] + window_start
+            end = segment['end'] + window_start
+            if end <= last_end + 0.01:
+                continue  # Já emitido pela janela anterior
+            if not is_last and start >= seam:
+                continue  # A próxima janela tem o contexto completo deste trecho
+            shifted = {**segment, 'start': start, 'end': end}
+            if 'word_starts' in segment:
+                shifted['word_starts'] = [t + window_start for t in segment['word_starts']]
+                shifted['word_ends'] = [t + window_start for t in segment['word_ends']]
+            if start < last_end - 0.01:
+                shifted = trim_segment_before(shifted, last_end)
+                if shifted is None:
+                    continue
+            segment_id += 1
+            last_end = end
+            shifted['id'] = segment_id
+            yield shifted
+
+def score_segments_incrementally(segments, batch_size=None):
+    """Calcula o sentimento dos segmentos em lotes à medida que chegam, sem esperar o fim da transcrição."""
+    batch_size = batch_size or sentiment_batch_size
+    batch = []
+    for segment in itertools.chain(segments, [None]):
+        if segment is not None:
+            batch.append(segment)
+        if batch and (segment is None or len(batch) >= batch_size):
+            sentiments = analyze_sentiments([clean_text(seg['text']) for seg in batch], batch_size)
+            for scored_segment, (label, score) in zip(batch, sentiments):
+                scored_segment['sentiment'] = label
+                scored_segment['sentiment_score'] = score
+                yield scored_segment
+            batch = []
+
+def hash_video_file(video_path, sample_size=4 * 1024 * 1024):
+    """Gera um hash rápido do conteúdo do vídeo a partir do tamanho e de amostras do início, meio e fim do arquivo."""
+    size = os.path.getsize(video_path)
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(video_path, 'rb') as f:
+        for offset in (0, max(size // 2 - sample_size // 2, 0), max(size - sample_size, 0)):
+            f.seek(offset)
+            digest.update(f.read(sample_size))
+    return digest.hexdigest()
+
+def transcript_cache_key(video_path):
+    """Chave do cache de transcrição: conteúdo do vídeo, modelo Whisper e opções de decodificação."""
+    options = json.dumps(whisper_options, sort_keys=True)
+    if streaming_config['enabled']:
+        options += f"|janelas {streaming_config['window_seconds']}s/{streaming_config['overlap_seconds']}s"
+    key = f"{hash_video_file(video_path)}|{config['whisper_model']}|{options}"
+    return hashlib.sha1(key.encode()).hexdigest()
+
+def load_cached_transcript(key):
+    """Retorna os segmentos em cache para a chave, ou None. Um acerto renova a posição do arquivo no LRU."""
+    cache_path = TRANSCRIPT_CACHE_DIR / f"{key}.json"
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            segments = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logging.error(f"Erro ao ler a transcrição em cache {cache_path}: {e}")
+        return None
+
+    os.utime(cache_path)
+    logging.info(f"Transcrição encontrada em cache: {cache_path}")
+    return segments
+
+def save_cached_transcript(key, segments):
+    """Salva os segmentos transcritos no cache e remove as entradas mais antigas se o limite for excedido."""
+    cache_path = TRANSCRIPT_CACHE_DIR / f"{key}.json"
+    try:
+        write_json_atomic(cache_path, segments)
+        logging.info(f"Transcrição salva em cache: {cache_path}")
+    except (OSError, TypeError, ValueError) as e:
+        logging.error(f"Erro ao salvar a transcrição em cache {cache_path}: {e}")
+        return
+    evict_transcript_cache()
+
+def evict_transcript_cache(max_bytes=None):
+    """Remove as transcrições usadas há mais tempo até o cache caber em max_bytes."""
+    max_bytes = transcript_cache_max_bytes if max_bytes is None else max_bytes
+    entries = []
+    for cache_path in TRANSCRIPT_CACHE_DIR.glob('*.json'):
         try:
-            with open(subtitle_path, 'w', encoding='utf-8') as f:
-                start_time = format_time(segment['start'])
-                end_time = format_time(segment['end'])
-                text = segment['text']
-
-                f.write(f"1\n")  # ID do segmento
-                f.write(f"{start_time} --> {end_time}\n") 
-                f.write(f"{text.strip()}\n")  # Texto
-
-            logging.info(f"Legenda salva com sucesso em: {subtitle_path}")
-        except Exception as e:
-            logging.error(f"Erro ao salvar a legenda: {e}")
-            raise
+            stat = cache_path.stat()
+        except FileNotFoundError:
+            continue  # Removido por outro job em paralelo
+        entries.append((stat.st_mtime, stat.st_size, cache_path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, cache_path in sorted(entries):
+        if total <= max_bytes:
+            break
+        cache_path.unlink(missing_ok=True)
+        total -= size
+        logging.info(f"Transcrição removida do cache (LRU): {cache_path}")
+
+def transcribe_video(video_path):
+    """Transcreve o vídeo, consultando antes o cache de transcrições para evitar decodificação de áudio e Whisper."""
+    cache_key = transcript_cache_key(video_path) if transcript_cache_enabled else None
+    if cache_key:
+        segments = load_cached_transcript(cache_key)
+        if segments is not None:
+            return segments
+
+    if streaming_config['enabled']:
+        # Transcrição em janelas: o sentimento de cada lote é calculado enquanto o restante é transcrito
+        segments = list(score_segments_incrementally(transcribe_audio_stream(video_path)))
+    else:
+        segments = transcribe_audio(load_audio(video_path))
+
+    if cache_key:
+        # O cache guarda só a transcrição; os scores dependem de outros modelos e parâmetros
+        save_cached_transcript(cache_key, [
+            {key: value for key, value in segment.items() if key not in ('sentiment', 'sentiment_score')}
+            for segment in segments
+        ])
+    return segments
+
+def format_ass_time(seconds):
+    """Converte tempo em segundos para o formato ASS (H:MM:SS.cc)."""
+    centiseconds = int(round(seconds * 100))
+    hours, remainder = divmod(centiseconds, 360000)
+    minutes, remainder = divmod(remainder, 6000)
+    seconds, centiseconds = divmod(remainder, 100)
+    return f"{hours}:{minutes:02}:{seconds:02}.{centiseconds:02}"
 
-    return subtitles_subfolder 
+def generate_unique_id():
+    """Gera um ID único baseado no timestamp, com sufixo aleatório para jobs iniciados no mesmo segundo."""    
+    return f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}"
 
 def analyze_sentiment(text: str):
     """Analisa o sentimento de um texto e retorna o rótulo e o score."""    
-    result = sentiment_analyzer(text)[0]
+    result = get_model('sentiment_model')(text)[0]
     # logging.info(f"Análise de sentimento: Texto: '{text}' | Rótulo: {result['label']} | Score: {result['score']}")
     return result['label'], result['score']
 
+def classify_in_batches(model_key, texts, batch_size):
+    """
+    Classifica vários textos com o pipeline do modelo em lotes e retorna (rótulo, score) na ordem original.
+    Os textos são ordenados por tamanho antes de formar os lotes para reduzir o padding.
+    """
+    analyzer = get_model(model_key)
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    results = [None] * len(texts)
+
+    # Etapa 'sentiment' ou 'emotion' no relatório da execução
+    with measure_stage(model_key.replace('_model', ''), len(texts)):
+        for batch_start in range(0, len(order), batch_size):
+            batch = order[batch_start:batch_start + batch_size]
+            outputs = analyzer([texts[i] for i in batch], batch_size=batch_size)
+            for i, result in zip(batch, outputs):
+                results[i] = (result['label'], result['score'])
+
+    return results
+
+def analyze_sentiments(texts, batch_size=None):
+    """Analisa o sentimento de vários textos em lotes e retorna (rótulo, score) na ordem original."""
+    return classify_in_batches('sentiment_model', texts, batch_size or sentiment_batch_size)
+
+def analyze_emotions(texts, batch_size=None):
+    """Classifica a emoção predominante de vários textos em lotes e retorna (rótulo, score) na ordem original."""
+    return classify_in_batches('emotion_model', texts, batch_size or sentiment_batch_size)
+
+# Modelo de tópicos compartilhado entre os vídeos do processo no modo online (por exemplo, um lote de um mesmo canal)
+_topic_model = {}
+_topic_model_lock = threading.Lock()
+
+def reset_topic_model():
+    """Descarta o modelo de tópicos acumulado no modo online, para começar um novo canal."""
+    with _topic_model_lock:
+        _topic_model.clear()
+
+def describe_topics(vectorizer, lda, doc_term_matrix, num_keywords):
+    """Retorna as palavras-chave de cada tópico do LDA e a distribuição de tópicos de cada documento."""
+    # O vocabulário é montado uma única vez para todas as palavras-chave
+    feature_names = vectorizer.get_feature_names_out()
+    topics = [[feature_names[i] for i in topic.argsort()[:-num_keywords - 1:-1]] for topic in lda.components_]
+    return topics, lda.transform(doc_term_matrix)
+
+def fit_topic_model(text_data, num_topics, num_keywords):
+    """
+    Ajusta o LDA aos textos e retorna (palavras-chave de cada tópico, distribuição de cada texto).
+    No modo 'batch' o modelo é novo a cada vídeo; no modo 'online' o vocabulário é fixado
+    no primeiro vídeo e o mesmo LDA é atualizado com partial_fit a cada vídeo seguinte.
+    No modo 'online' o resultado é lido ainda com o lock, antes que outro job atualize o modelo.
+    """
+    if topics_learning_method != 'online':
+        vectorizer = CountVectorizer(max_df=0.95, min_df=1, stop_words='english')
+        doc_term_matrix = vectorizer.fit_transform(text_data)
+        lda = LatentDirichletAllocation(n_components=num_topics, random_state=42)
+        lda.fit(doc_term_matrix)
+        return describe_topics(vectorizer, lda, doc_term_matrix, num_keywords)
+
+    with _topic_model_lock:
+        if not _topic_model:
+            vectorizer = CountVectorizer(max_df=0.95, min_df=1, stop_words='english')
+            doc_term_matrix = vectorizer.fit_transform(text_data)
+            _topic_model['vectorizer'] = vectorizer
+            _topic_model['lda'] = LatentDirichletAllocation(
+                n_components=num_topics, learning_method='online', random_state=42
+            )
+        else:
+            doc_term_matrix = _topic_model['vectorizer'].transform(text_data)
+        _topic_model['lda'].partial_fit(doc_term_matrix)
+        return describe_topics(_topic_model['vectorizer'], _topic_model['lda'], doc_term_matrix, num_keywords)
+
 def extract_topics(segments, num_topics=num_topics, num_keywords=num_keywords):
-    text_data = [segment['text'] for segment in segments if segment['text'].strip()]
+    """
+    Extrai tópicos dos segmentos com LDA. Retorna a lista de palavras-chave de cada tópico e,
+    para cada segmento, sua distribuição de tópicos (None para segmentos sem texto).
+    """
+    indices = [i for i, segment in enumerate(segments) if segment['text'].strip()]
+    text_data = [segments[i]['text'] for i in indices]
     num_documents = len(text_data)
 
     if num_documents < 2:
         raise ValueError("O número de segmentos é muito pequeno para extrair tópicos.")
 
+    distributions = [None] * len(segments)
     try:
-        vectorizer = CountVectorizer(max_df=0.95, min_df=1, stop_words='english')
-        doc_term_matrix = vectorizer.fit_transform(text_data)
-
-        lda = LatentDirichletAllocation(n_components=num_topics, random_state=42)
-        lda.fit(doc_term_matrix)
-
-        topics = []
-        for topic_idx, topic in enumerate(lda.components_):
-            top_keywords = [vectorizer.get_feature_names_out()[i] for i in topic.argsort()[:-num_keywords - 1:-1]]
-            topics.append(top_keywords)
+        with measure_stage('extract_topics', num_documents):
+            topics, document_topics = fit_topic_model(text_data, num_topics, num_keywords)
+            for i, distribution in zip(indices, document_topics):
+                distributions[i] = distribution
 
-        return topics
+        return topics, distributions
 
     except ValueError as e:
         logging.error(f"Erro ao ajustar o vectorizer: {str(e)}")
-        return []
+        return [], distributions
 
 def select_best_segments(segments: list, min_sentiment_score: float, min_duration: int = min_duration, max_duration: int = max_duration) -> list:
     """Seleciona todos os segmentos com base na análise de sentimentos e duração, sem limite de quantidade."""
@@ -199,13 +686,18 @@ def select_best_segments(segments: list, min_sentiment_score: float, min_duratio
     sentiment_summary = {'positive': 0, 'negative': 0, 'neutral': 0}
 
     # Extrair tópicos para todos os segmentos
-    topics = extract_topics(segments)
+    topics, topic_distributions = extract_topics(segments)
     segment_motives = []
-    for segment in segments:
-        text = clean_text(segment['text'])
-        label, score = analyze_sentiment(text)
-
+    texts = [clean_text(segment['text']) for segment in segments]
+    if all('sentiment_score' in segment for segment in segments):
+        # Sentimento já calculado durante a transcrição em janelas
+        sentiments = [(segment['sentiment'], segment['sentiment_score']) for segment in segments]
+    else:
+        sentiments = analyze_sentiments(texts)
+    for segment, text, (label, score), distribution in zip(segments, texts, sentiments, topic_distributions):
         motivo = ""
+        segment['sentiment'] = label
+        segment['sentiment_score'] = score
         if score >= min_sentiment_score:
             if score > 0.9:
                 motivo = "Sentimento extremamente positivo ou negativo"
@@ -214,9 +706,12 @@ def select_best_segments(segments: list, min_sentiment_score: float, min_duratio
             else:
                 motivo = "Pontuação de sentimento aceitável, alinhado com o contexto"
 
-            segment['sentiment'] = label
-            segment['sentiment_score'] = score
-            segment['topics'] = topics
+            if distribution is not None and topics:
+                # Palavras-chave do tópico predominante e a distribuição completa do segmento
+                segment['topics'] = topics[int(np.argmax(distribution))]
+                segment['topic_distribution'] = [round(float(p), 4) for p in distribution]
+            else:
+                segment['topics'] = []
             selected_segments.append(segment)
 
             segment_motives.append({
@@ -233,8 +728,19 @@ def select_best_segments(segments: list, min_sentiment_score: float, min_duratio
     logging.info(f"Estilo predominante do vídeo: {max(sentiment_summary, key=sentiment_summary.get)}")
     logging.info("Motivos para seleção dos segmentos:")
 
-    # Combine os segmentos selecionados
-    combined_segments = combine_segments(selected_segments, min_duration, max_duration)
+    if selection_strategy == 'dp':
+        # Escolhe as janelas contíguas da transcrição que maximizam o score total
+        scores = [score if score >= min_sentiment_score else 0.0 for _, score in sentiments]
+        if emotion_weight > 0:
+            emotions = analyze_emotions(texts)
+            scores = [
+                score + (emotion_weight * emotion_score if emotion_label != 'neutral' else 0.0)
+                for score, (emotion_label, emotion_score) in zip(scores, emotions)
+            ]
+        combined_segments = select_segments_dp(segments, scores, min_duration, max_duration)
+    else:
+        # Combine os segmentos selecionados
+        combined_segments = combine_segments(selected_segments, min_duration, max_duration)
 
     # Retorne apenas os segmentos que atendem ao critério de pontuação
     ranked_segments = [seg for seg in combined_segments if seg['sentiment_score'] >= min_sentiment_score]
@@ -272,6 +778,61 @@ def combine_segments(selected_segments, min_duration, max_duration):
 
     return combined_segments  # Sem limitação de número de segmentos
 
+def select_windows_dp(segments, scores, min_duration, max_duration):
+    """
+    Escolhe janelas sem sobreposição, cada uma formada por segmentos contíguos da transcrição e com
+    duração entre min_duration e max_duration, que maximizam a soma dos scores dos segmentos.
+    Programação dinâmica de intervalos ponderados em O(n·k), onde k é o número máximo de segmentos
+    que cabem em max_duration. Retorna os pares (início, fim) de índices, com fim exclusivo.
+    """
+    n = len(segments)
+    prefix = [0.0]
+    for score in scores:
+        prefix.append(prefix[-1] + score)
+
+    best = [0.0] * (n + 1)  # best[j]: maior score total usando apenas os j primeiros segmentos
+    choice = [None] * (n + 1)  # início da janela que termina no segmento j - 1, se houver
+    for j in range(1, n + 1):
+        best[j] = best[j - 1]
+        end_time = segments[j - 1]['end']
+        for i in range(j - 1, -1, -1):
+            duration = end_time - segments[i]['start']
+            if duration > max_duration:
+                break
+            if duration < min_duration:
+                continue
+            window_score = prefix[j] - prefix[i]
+            if window_score > 0 and best[i] + window_score > best[j]:
+                best[j] = best[i] + window_score
+                choice[j] = i
+
+    windows = []
+    j = n
+    while j > 0:
+        if choice[j] is None:
+            j -= 1
+        else:
+            windows.append((choice[j], j))
+            j = choice[j]
+    return windows[::-1]
+
+def select_segments_dp(segments, scores, min_duration, max_duration):
+    """Monta os segmentos combinados a partir das janelas ótimas escolhidas por select_windows_dp."""
+    combined_segments = []
+    for start, end in select_windows_dp(segments, scores, min_duration, max_duration):
+        window = segments[start:end]
+        relevant = [seg['sentiment_score'] for seg, score in zip(window, scores[start:end]) if score > 0]
+        combined_segments.append({
+            'start': window[0]['start'],
+            'end': window[-1]['end'],
+            'text': " ".join(segment['text'] for segment in window),
+            'sentiment_score': sum(relevant) / len(relevant),
+            'score': sum(scores[start:end])
+        })
+        logging.info(f"Janela selecionada: {window[0]['start']:.2f}-{window[-1]['end']:.2f}s | "
+                     f"{len(window)} segmentos | Score: {combined_segments[-1]['score']:.2f}")
+    return combined_segments
+
 def create_combined_segment(segments, start_time):
     """Cria um segmento combinado de vários segmentos menores."""
     combined_text = " ".join([segment['text'] for segment in segments])
@@ -284,103 +845,65 @@ def create_combined_segment(segments, start_time):
         'sentiment_score': segments[-1]['sentiment_score']
     }
 
-def add_subtitle(clip_path, srt_filename, font_size=20, 
-                 font_color="16777215", border_color="0", border_width=4,
-                 alignment=2, width=1080, 
-                 height=1920, x=None, y=None):
-
-    srt_temp_file = None  # Inicializa como None para garantir que exista
-    try:
-        # Verificar se os parâmetros não são None
-        if not clip_path or not srt_filename or not font_file:
-            raise ValueError("Parâmetros inválidos. clip_path, srt_filename e font_file não podem ser None.")
-        
-        # Verificar se o arquivo SRT e o vídeo existem
-        if not os.path.exists(srt_filename):
-            raise FileNotFoundError(f"Arquivo SRT não encontrado: {srt_filename}")
-        
-        if not os.path.exists(clip_path):
-            raise FileNotFoundError(f"Arquivo de vídeo não encontrado: {clip_path}")
-        
-        subs = pysrt.open(srt_filename)
-        srt_temp_file = 'temp_subtitles.srt'
-        with open(srt_temp_file, 'w', encoding='utf-8') as f:
-            for sub in subs:
-                f.write(f"{sub.index}\n")
-                start_time = f"{sub.start.hours:02}:{sub.start.minutes:02}:{sub.start.seconds:02},{sub.start.milliseconds:03}"
-                end_time = f"{sub.end.hours:02}:{sub.end.minutes:02}:{sub.end.seconds:02},{sub.end.milliseconds:03}"
-                f.write(f"{start_time} --> {end_time}\n")
-                f.write(f"{sub.text}\n\n")
-    
-        # Atualizar o comando FFmpeg para apenas adicionar as legendas sem crop
-        command = [
-            'ffmpeg',
-            '-y', 
-            '-i', clip_path,
-            '-vf', (f"subtitles={srt_temp_file}:force_style='FontName={font_file},"
-                    f"FontSize={font_size},"
-                    f"PrimaryColour={font_color},"
-                    f"BorderStyle=1,"
-                    f"Outline={border_width},"
-                    f"OutlineColour={border_color},"
-                    f"Alignment={alignment}'"
-                ),
-            '-codec:a', 'copy', 
-            'temp_subtitled.mp4'
-        ]
-        
-        subprocess.run(command, check=True)
-        logging.info(f"Legenda adicionada com sucesso no vídeo '{clip_path}'. Arquivo de saída temporário: 'temp_subtitled.mp4'")
-        
-        shutil.move('temp_subtitled.mp4', clip_path)
-        logging.info(f"O arquivo temporário foi movido para substituir o original: {clip_path}")
-        
-    except ValueError as e:
-        logging.error(f"Erro de valor: {e}")
-    except FileNotFoundError as e:
-        logging.error(e)
-    except subprocess.CalledProcessError as e:
-        logging.error(f"Erro ao adicionar legenda: {e}")
-    except Exception as e:
-        logging.error(f"Ocorreu um erro: {e}")
-    finally:
-        if srt_temp_file and os.path.exists(srt_temp_file):
-            os.remove(srt_temp_file)
-            logging.info(f"Arquivo temporário {srt_temp_file} removido com sucesso.")
+def build_ass_document(segments, font_size=20, font_color="&H00FFFFFF", border_color="&H00000000",
+                       border_width=4, alignment=2, margin_v=10):
+    """
+    Monta em memória um documento ASS com os blocos de legenda e o estilo do config.json já embutido.
+    PlayResX/PlayResY seguem o padrão que o FFmpeg aplica ao converter SRT, para que o tamanho da fonte
+    e da borda continue igual ao das legendas SRT usadas antes.
+    """
+    lines = [
+        "[Script Info]",
+        "ScriptType: v4.00+",
+        "PlayResX: 384",
+        "PlayResY: 288",
+        "ScaledBorderAndShadow: yes",
+        "",
+        "[V4+ Styles]",
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, "
+        "Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, "
+        "MarginL, MarginR, MarginV, Encoding",
+        f"Style: Default,{subtitle_font_name},{font_size},{font_color},{font_color},{border_color},&H00000000,"
+        f"0,0,0,0,100,100,0,0,1,{border_width},0,{alignment},10,10,{margin_v},1",
+        "",
+        "[Events]",
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+    ]
+    for segment in segments:
+        # Chaves abririam blocos de override e quebras de linha viram \N
+        text = segment['text'].strip().replace('{', '(').replace('}', ')').replace('\n', '\\N')
+        lines.append(f"Dialogue: 0,{format_ass_time(segment['start'])},{format_ass_time(segment['end'])},"
+                     f"Default,,0,0,0,,{text}")
+    return "\n".join(lines) + "\n"
 
-def adjust_focus(clip):
+def write_clip_subtitles(segments, subtitle_path, style=None):
     """
-    Ajusta o foco do clipe para a pessoa que está falando ou para a cena importante,
-    mantendo as dimensões fixas de 1080x1920.
+    Grava as legendas do clipe em um único arquivo ASS (lido direto pelo filtro ass do FFmpeg) e,
+    com subtitles.save_srt ativo, também em SRT ao lado. style é o subtitle_style do perfil de saída.
+    Retorna o caminho do ASS.
     """
-    # Converter o primeiro frame para OpenCV
-    frame = clip.get_frame(0)
-    frame_cv = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-    
-    # Carregar o classificador de faces pré-treinado do OpenCV
-    face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-    
-    # Detectar faces no frame
-    gray = cv2.cvtColor(frame_cv, cv2.COLOR_BGR2GRAY)
-    faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
-    
-    if len(faces) > 0:
-        # Supondo que a primeira face detectada é a principal
-        (x, y, w, h) = faces[0]
-        center_x = x + w // 2
-        center_y = y + h // 2
-    else:
-        # Se nenhuma face for detectada, manter o foco central
-        center_x = frame.shape[1] // 2
-        center_y = frame.shape[0] // 2
-    
-    # Definir as dimensões do crop para 1080x1920
-    crop_width = 1080
-    crop_height = 1920
-    
+    ass_path = Path(subtitle_path).with_suffix('.ass')
+    ass_path.parent.mkdir(parents=True, exist_ok=True)
+    ass_path.write_text(build_ass_document(segments, **(style or {})), encoding='utf-8')
+    if save_srt:
+        generate_srt(segments, str(ass_path.with_suffix('.srt')))
+    logging.info(f"Legendas do clipe salvas em: {ass_path}")
+    return ass_path
+
+def subtitle_filter(subtitle_path):
+    """Filtro ass do FFmpeg que queima as legendas do arquivo ASS, com o estilo embutido e a fonte de font_file."""
+    fonts_dir = (BASE_DIR / font_file).parent
+    return f"ass=filename='{escape_filter_path(subtitle_path)}':fontsdir='{escape_filter_path(fonts_dir)}'"
+
+def escape_filter_path(path):
+    """Escapa um caminho de arquivo para uso como opção dentro de um filtergraph do FFmpeg."""
+    return str(path).replace('\\', '/').replace(':', '\\:').replace("'", "\\'")
+
+def crop_window(center_x, center_y, frame_width, frame_height, crop_width=1080, crop_height=1920):
+    """Calcula a janela de crop (x1, y1, x2, y2) centrada no ponto informado, dentro dos limites do frame."""
     # Calcular os limites do crop
-    x1 = center_x - crop_width // 2
-    y1 = center_y - crop_height // 2
+    x1 = int(center_x) - crop_width // 2
+    y1 = int(center_y) - crop_height // 2
     x2 = x1 + crop_width
     y2 = y1 + crop_height
     
@@ -391,93 +914,634 @@ def adjust_focus(clip):
     if y1 < 0:
         y1 = 0
         y2 = crop_height
-    if x2 > frame.shape[1]:
-        x2 = frame.shape[1]
+    if x2 > frame_width:
+        x2 = frame_width
         x1 = x2 - crop_width
-    if y2 > frame.shape[0]:
-        y2 = frame.shape[0]
+    if y2 > frame_height:
+        y2 = frame_height
         y1 = y2 - crop_height
     
     # Garantir que as coordenadas do crop estejam dentro dos limites do frame
     x1 = max(x1, 0)
     y1 = max(y1, 0)
-    x2 = min(x2, frame.shape[1])
-    y2 = min(y2, frame.shape[0])
-    
-    # Aplicar o crop ao clipe
-    focused_clip = clip.crop(x1=x1, y1=y1, x2=x2, y2=y2)
+    x2 = min(x2, frame_width)
+    y2 = min(y2, frame_height)
     
-    return focused_clip
+    return int(x1), int(y1), int(x2), int(y2)
 
-def save_clips(video_path, selected_segments, unique_id, video_name):
-    """Salva os clipes selecionados em uma nova pasta, usando SRTs para nomeação e referência."""
-    clip_subfolder = CLIPS_DIR / f"{video_name}_{unique_id}" 
-    clip_subfolder.mkdir(parents=True, exist_ok=True)
+def focus_center(frame):
+    """
+    Centro do foco (x, y) em um frame BGR do OpenCV: o centro da face principal ou, sem faces, o centro
+    do frame. É o ponto bruto, sem janela de crop: o tamanho da janela depende do perfil de saída.
+    """
+    center = pick_face_center(detect_faces(frame))
+    if center is None:
+        return frame.shape[1] / 2, frame.shape[0] / 2
+    return center
+
+def open_video_reader(video_path):
+    """Abre um leitor do OpenCV para o vídeo. Quem abre é responsável por chamar release()."""
+    capture = cv2.VideoCapture(str(video_path))
+    if not capture.isOpened():
+        capture.release()
+        raise ValueError(f"Não foi possível abrir o vídeo: {video_path}")
+    return capture
+
+def read_frame_at(capture, timestamp):
+    """Lê o frame (BGR) no instante informado, em segundos, a partir de um leitor já aberto."""
+    capture.set(cv2.CAP_PROP_POS_MSEC, timestamp * 1000)
+    ok, frame = capture.read()
+    if not ok:
+        raise ValueError(f"Não foi possível ler o frame em {timestamp:.2f}s")
+    return frame
+
+@lru_cache(maxsize=None)
+def get_face_detector():
+    """
+    Carrega o detector de faces configurado (face_detection.backend) uma única vez por processo.
+    O backend 'dnn' usa o detector SSD do OpenCV na CPU; se os arquivos do modelo não
+    estiverem disponíveis, volta para o classificador Haar.
+    """
+    if face_detection_config['backend'] == 'dnn':
+        try:
+            net = cv2.dnn.readNetFromCaffe(str(BASE_DIR / face_detection_config['dnn_prototxt']),
+                                           str(BASE_DIR / face_detection_config['dnn_model']))
+            net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+            net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+            logging.info("Detector de faces DNN carregado")
+            return 'dnn', net
+        except cv2.error as e:
+            logging.error(f"Erro ao carregar o detector de faces DNN, usando Haar: {e}")
 
-    clips_saved = []
+    face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+    logging.info("Classificador de faces Haar carregado")
+    return 'haar', face_cascade
 
-    for i, segment in enumerate(selected_segments):
-        start_time = segment['start']
-        end_time = segment['end']
-        srt_filename = SUBTITLE_DIR / f"{video_name}_{unique_id}/{video_name}_{unique_id}_{i + 1}.srt"  # caminho SRT
-        clip_filename = f"{video_name}_{unique_id}_{i + 1}.mp4"  # Nome do clipe
-        clip_path = clip_subfolder / clip_filename
+# O detector é compartilhado pelo processo; as chamadas de detecção são serializadas
+_face_detector_lock = threading.Lock()
 
+def detect_faces(frame):
+    """
+    Detecta faces em um frame BGR, processando uma cópia reduzida para face_detection.detection_width.
+    Retorna as caixas (x, y, w, h) na resolução original do frame.
+    """
+    backend, detector = get_face_detector()
+    frame_height, frame_width = frame.shape[:2]
+
+    if backend == 'dnn':
+        blob = cv2.dnn.blobFromImage(cv2.resize(frame, (300, 300)), 1.0, (300, 300), (104.0, 177.0, 123.0))
+        with _face_detector_lock:
+            detector.setInput(blob)
+            detections = detector.forward()
+        faces = []
+        for detection in detections[0, 0]:
+            if detection[2] < face_detection_config['dnn_confidence']:
+                continue
+            # As caixas do SSD são relativas, então valem direto para a resolução original
+            x1, y1, x2, y2 = detection[3:7] * [frame_width, frame_height, frame_width, frame_height]
+            faces.append((x1, y1, x2 - x1, y2 - y1))
+        return faces
+
+    scale = min(1.0, face_detection_config['detection_width'] / frame_width)
+    if scale < 1.0:
+        frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    min_size = max(int(30 * scale), 12)
+    with _face_detector_lock:
+        faces = detector.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(min_size, min_size))
+    return [(x / scale, y / scale, w / scale, h / scale) for (x, y, w, h) in faces]
+
+def pick_face_center(faces, previous_center=None):
+    """Escolhe a face a seguir: a mais próxima do centro anterior ou, sem histórico, a maior."""
+    if not faces:
+        return None
+    centers = [(x + w / 2, y + h / 2, w * h) for (x, y, w, h) in faces]
+    if previous_center is None:
+        center_x, center_y, _ = max(centers, key=lambda c: c[2])
+    else:
+        center_x, center_y, _ = min(
+            centers, key=lambda c: (c[0] - previous_center[0]) ** 2 + (c[1] - previous_center[1]) ** 2
+        )
+    return center_x, center_y
+
+def smooth_values(values, alpha):
+    """Suaviza uma série com média móvel exponencial nos dois sentidos, sem atrasar o movimento."""
+    forward = []
+    for value in values:
+        forward.append(value if not forward else alpha * value + (1 - alpha) * forward[-1])
+    backward = []
+    for value in reversed(forward):
+        backward.append(value if not backward else alpha * value + (1 - alpha) * backward[-1])
+    return backward[::-1]
+
+def split_into_shots(start_time, end_time, scene_cuts):
+    """Retorna o início de cada tomada do trecho, em segundos relativos ao início do clipe."""
+    first = bisect.bisect_right(scene_cuts, start_time)
+    last = bisect.bisect_left(scene_cuts, end_time)
+    return [0.0] + [cut - start_time for cut in scene_cuts[first:last]]
+
+def track_focus(capture, start_time, end_time, scene_cuts=()):
+    """
+    Acompanha a face principal do trecho, amostrando frames a face_tracking.sample_fps.
+    O rastreamento e a suavização recomeçam a cada corte de cena dentro do trecho.
+    Retorna as tomadas como lista de (início relativo, [(t relativo ao clipe, centro_x, centro_y)])
+    e o tamanho do frame (largura, altura).
+    """
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    stride = max(1, round(fps / face_tracking_fps))
+    total_frames = max(1, int((end_time - start_time) * fps))
+    shot_starts = split_into_shots(start_time, end_time, scene_cuts)
+
+    capture.set(cv2.CAP_PROP_POS_MSEC, start_time * 1000)
+    samples = [[] for _ in shot_starts]
+    previous_center = None
+    current_shot = 0
+    frame_size = None
+    for frame_index in range(total_frames):
+        if frame_index % stride:
+            # Frames fora da amostragem são apenas avançados, sem conversão nem detecção
+            if not capture.grab():
+                break
+            continue
+
+        ok, frame = capture.read()
+        if not ok:
+            break
+        t = frame_index / fps
+        shot = bisect.bisect_right(shot_starts, t) - 1
+        if shot != current_shot:
+            # Nova tomada: a face seguida antes do corte não serve de referência
+            current_shot = shot
+            previous_center = None
+        frame_size = (frame.shape[1], frame.shape[0])
+        center = pick_face_center(detect_faces(frame), previous_center)
+        if center is not None:
+            previous_center = center
+        samples[shot].append((t, center))
+
+    if frame_size is None:
+        raise ValueError(f"Não foi possível ler frames em {start_time:.2f}s")
+
+    shots = []
+    for shot_start, shot_samples in zip(shot_starts, samples):
+        if not shot_samples:
+            continue
+
+        # Amostras sem face mantêm o último centro conhecido da tomada; sem nenhuma face, foco central
+        known = [center for _, center in shot_samples if center is not None]
+        last_center = known[0] if known else (frame_size[0] / 2, frame_size[1] / 2)
+        centers = []
+        for _, center in shot_samples:
+            last_center = center or last_center
+            centers.append(last_center)
+
+        xs = smooth_values([c[0] for c in centers], face_tracking_smoothing)
+        ys = smooth_values([c[1] for c in centers], face_tracking_smoothing)
+        shots.append((shot_start, [(t, x, y) for (t, _), x, y in zip(shot_samples, xs, ys)]))
+
+    logging.info(f"Rastreamento de foco: {sum(len(s) for s in samples)} frames amostrados "
+                 f"em {end_time - start_time:.1f}s de clipe, {len(shots)} tomada(s)")
+    return shots, frame_size
+
+def focus_to_crop_path(focus, crop_width=1080, crop_height=1920):
+    """
+    Converte o foco em um caminho de crop [(t, (x1, y1, x2, y2))], descartando pontos que movem
+    a janela menos de face_tracking.min_shift_px em relação ao último mantido. Nos cortes de cena
+    a janela salta direto para a nova posição, sem deslizar entre as tomadas.
+    """
+    shots, (frame_width, frame_height) = focus
+    crop_path = []
+    for shot_start, focus_path in shots:
+        shot_path = []
+        for t, center_x, center_y in focus_path:
+            window = crop_window(center_x, center_y, frame_width, frame_height, crop_width, crop_height)
+            if shot_path and max(abs(window[0] - shot_path[-1][1][0]), abs(window[1] - shot_path[-1][1][1])) < face_tracking_min_shift:
+                continue
+            shot_path.append((max(t, shot_start), window))
+
+        # Mantém o último ponto para que o movimento termine onde o rastreamento terminou
+        t, center_x, center_y = focus_path[-1]
+        last_window = crop_window(center_x, center_y, frame_width, frame_height, crop_width, crop_height)
+        if last_window != shot_path[-1][1]:
+            shot_path.append((t, last_window))
+
+        if crop_path:
+            # Segura a janela anterior até o corte e começa a tomada já na nova posição
+            if shot_start - 0.001 > crop_path[-1][0]:
+                crop_path.append((shot_start - 0.001, crop_path[-1][1]))
+            shot_path[0] = (shot_start, shot_path[0][1])
+        crop_path.extend(shot_path)
+    return crop_path
+
+def piecewise_linear_expr(points):
+    """
+    Expressão do FFmpeg em função de t que interpola linearmente os pontos (t, valor).
+    Os tempos são arredondados ao milissegundo; trechos que ficam com duração zero (como o ponto
+    que segura a janela até um corte de cena) viram um salto, sem divisão por zero.
+    O trecho certo é escolhido por busca binária em if() aninhados, com profundidade O(log n):
+    o avaliador de expressões do FFmpeg recusa aninhamentos de mais de ~100 níveis.
+    """
+    if all(value == points[0][1] for _, value in points):
+        return str(points[0][1])
+    # Cada folha é (início, expressão); a última mantém o valor final depois do último ponto
+    leaves = []
+    for (t0, v0), (t1, v1) in zip(points, points[1:]):
+        t0, t1 = round(t0, 3), round(t1, 3)
+        if t1 <= t0:
+            continue
+        leaves.append((t0, f"{v0}+({v1 - v0})*(t-{t0:.3f})/{t1 - t0:.3f}"))
+    leaves.append((round(points[-1][0], 3), str(points[-1][1])))
+
+    def bisect_leaves(lo, hi):
+        if hi - lo == 1:
+            return leaves[lo][1]
+        mid = (lo + hi) // 2
+        return f"if(lt(t,{leaves[mid][0]:.3f}),{bisect_leaves(lo, mid)},{bisect_leaves(mid, hi)})"
+
+    return bisect_leaves(0, len(leaves))
+
+def crop_filter(crop_path):
+    """Monta o filtro crop do FFmpeg; com vários pontos, a posição da janela acompanha o caminho ao longo do clipe."""
+    _, (x1, y1, x2, y2) = crop_path[0]
+    if len(crop_path) == 1:
+        return f"crop={x2 - x1}:{y2 - y1}:{x1}:{y1}"
+    x_expr = piecewise_linear_expr([(t, window[0]) for t, window in crop_path])
+    y_expr = piecewise_linear_expr([(t, window[1]) for t, window in crop_path])
+    return f"crop={x2 - x1}:{y2 - y1}:x='{x_expr}':y='{y_expr}'"
+
+def compute_clip_focus(video_path, segments, scene_cuts=()):
+    """
+    Calcula o foco de todos os clipes do job com um único leitor do vídeo, fechado ao final.
+    Os segmentos são visitados em ordem de início para que o leitor só avance no arquivo.
+    Com face_tracking ativo o foco acompanha a face ao longo do clipe; sem ele, usa o primeiro
+    frame de cada tomada. Em ambos os casos o foco é recalculado a cada corte de cena.
+    Retorna a lista de focos na ordem dos segmentos, com None nos clipes que falharem.
+    """
+    focuses = [None] * len(segments)
+    capture = open_video_reader(video_path)
+    try:
+        with measure_stage('adjust_focus', len(segments)):
+            for i in sorted(range(len(segments)), key=lambda i: segments[i]['start']):
+                start_time, end_time = segments[i]['start'], segments[i]['end']
+                try:
+                    if face_tracking_enabled:
+                        focuses[i] = track_focus(capture, start_time, end_time, scene_cuts)
+                        continue
+
+                    shots = []
+                    for shot_start in split_into_shots(start_time, end_time, scene_cuts):
+                        # Lê um frame logo depois do corte, já dentro da nova tomada
+                        frame = read_frame_at(capture, start_time + shot_start + 0.04)
+                        center_x, center_y = focus_center(frame)
+                        shots.append((shot_start, [(shot_start, center_x, center_y)]))
+                    focuses[i] = (shots, (frame.shape[1], frame.shape[0]))
+                except Exception as e:
+                    logging.error(f"Erro ao calcular o foco do clipe {i + 1}: {e}")
+    finally:
+        capture.release()
+    return focuses
+
+def iter_gray_frames(video_path, sample_fps, width, height):
+    """Decodifica o vídeo com o FFmpeg em frames pequenos em tons de cinza, amostrados a sample_fps. Gera (t, frame)."""
+    command = [
+        'ffmpeg', '-nostdin', '-v', 'error', '-i', str(video_path), '-an',
+        '-vf', f"fps={sample_fps},scale={width}:{height},format=gray",
+        '-f', 'rawvideo', '-'
+    ]
+    frame_bytes = width * height
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        index = 0
+        while True:
+            data = process.stdout.read(frame_bytes)
+            if len(data) < frame_bytes:
+                break
+            yield index / sample_fps, np.frombuffer(data, np.uint8)
+            index += 1
+    finally:
+        process.stdout.close()
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+
+def gray_histogram(frame):
+    """Histograma normalizado de 32 faixas de um frame em tons de cinza."""
+    return np.bincount(np.ravel(frame) >> 3, minlength=32) / frame.size
+
+def histogram_distance(hist_a, hist_b):
+    """Distância entre dois histogramas normalizados, de 0 (iguais) a 1 (sem sobreposição)."""
+    return 0.5 * float(np.abs(hist_a - hist_b).sum())
+
+def refine_scene_cut(capture, coarse_time, window):
+    """Localiza o primeiro frame da nova tomada no intervalo [coarse_time - window, coarse_time + window], na taxa original."""
+    width = scene_detection_config['frame_width']
+    height = scene_detection_config['frame_height']
+    capture.set(cv2.CAP_PROP_POS_MSEC, max(coarse_time - window, 0) * 1000)
+    previous_hist = None
+    best_distance, best_time = 0.0, coarse_time
+    while True:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        # Lido depois do read(): no backend FFmpeg do OpenCV é o instante do frame que acabou de ser lido
+        t = capture.get(cv2.CAP_PROP_POS_MSEC) / 1000
+        if t > coarse_time + window + 0.001:
+            break
+        hist = gray_histogram(cv2.cvtColor(cv2.resize(frame, (width, height)), cv2.COLOR_BGR2GRAY))
+        if previous_hist is not None:
+            distance = histogram_distance(previous_hist, hist)
+            if distance > best_distance:
+                best_distance, best_time = distance, t
+        previous_hist = hist
+    return best_time
+
+def detect_scene_cuts(video_path):
+    """
+    Indexa os cortes de cena do vídeo comparando histogramas de frames reduzidos,
+    amostrados a scene_detection.sample_fps, e refina cada corte na taxa original de frames.
+    Retorna a lista ordenada dos instantes (em segundos) em que cada nova tomada começa.
+    """
+    sample_fps = scene_detection_config['sample_fps']
+    threshold = scene_detection_config['threshold']
+    coarse_cuts = []
+    previous_hist = None
+    with measure_stage('scene_detection') as stage:
+        for t, frame in iter_gray_frames(video_path, sample_fps,
+                                         scene_detection_config['frame_width'], scene_detection_config['frame_height']):
+            hist = gray_histogram(frame)
+            if previous_hist is not None and histogram_distance(previous_hist, hist) >= threshold:
+                coarse_cuts.append(t)
+            previous_hist = hist
+            stage['items'] += 1
+
+        capture = open_video_reader(video_path)
         try:
-            video = mp.VideoFileClip(str(video_path))
-            clip = video.subclip(start_time, end_time)
-            
-            # Ajustar o foco no clipe
-            focused_clip = adjust_focus(clip)
-            
-            # Adicionar transições suaves (opcional, mas recomendado)
-            focused_clip = focused_clip.fx(mp.vfx.fadein, duration=0.5).fx(mp.vfx.fadeout, duration=0.5)
-            
-            # Salvar o clipe com foco ajustado e transições
-            focused_clip.write_videofile(str(clip_path), codec="libx264", audio_codec="aac")
-            clips_saved.append(clip_path)
-            
-            # Gerar e adicionar legendas
-            srt_filename = generate_srt_from_video(str(clip_path), srt_filename)
-            add_subtitle(str(clip_path), srt_filename)
-            logging.info(f"Clip salvo: {clip_path}")
+            cuts = [refine_scene_cut(capture, t, 1.0 / sample_fps) for t in coarse_cuts]
+        finally:
+            capture.release()
+
+    logging.info(f"{len(cuts)} cortes de cena detectados em {video_path}")
+    return sorted(set(round(cut, 3) for cut in cuts))
+
+def load_scene_cuts(video_path):
+    """Retorna o índice de cortes de cena do vídeo, calculado uma vez e guardado no cache ao lado das transcrições."""
+    options = json.dumps(scene_detection_config, sort_keys=True)
+    key = hashlib.sha1(f"{hash_video_file(video_path)}|{options}".encode()).hexdigest()
+    cache_path = SCENE_CACHE_DIR / f"{key}.json"
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            logging.info(f"Cortes de cena encontrados em cache: {cache_path}")
+            return json.load(f)
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        logging.error(f"Erro ao ler os cortes de cena em cache {cache_path}: {e}")
+
+    cuts = detect_scene_cuts(video_path)
+    try:
+        write_json_atomic(cache_path, cuts)
+    except OSError as e:
+        logging.error(f"Erro ao salvar os cortes de cena em cache {cache_path}: {e}")
+    return cuts
+
+def nearest_scene_cut(scene_cuts, timestamp, tolerance):
+    """Retorna o corte de cena mais próximo do instante, se estiver a no máximo tolerance segundos, ou None."""
+    index = bisect.bisect_left(scene_cuts, timestamp)
+    candidates = scene_cuts[max(index - 1, 0):index + 1]
+    if not candidates:
+        return None
+    cut = min(candidates, key=lambda c: abs(c - timestamp))
+    return cut if abs(cut - timestamp) <= tolerance else None
+
+def snap_to_scene_cuts(segments, scene_cuts, tolerance=None):
+    """
+    Ajusta início e fim dos segmentos para cortes de cena próximos (até scene_detection.snap_tolerance),
+    para que os clipes comecem no primeiro frame de uma tomada e terminem antes da seguinte.
+    Se o ajuste tirar o clipe de [min_duration, max_duration], tenta ajustar só o início ou só o
+    fim; se nenhum couber, mantém os limites originais.
+    """
+    tolerance = scene_detection_config['snap_tolerance'] if tolerance is None else tolerance
+    snapped_segments = []
+    for segment in segments:
+        start_cut = nearest_scene_cut(scene_cuts, segment['start'], tolerance)
+        end_cut = nearest_scene_cut(scene_cuts, segment['end'], tolerance)
+        start_time = segment['start'] if start_cut is None else start_cut
+        end_time = segment['end'] if end_cut is None else end_cut
+        candidates = [(start_time, end_time), (start_time, segment['end']), (segment['start'], end_time)]
+        start_time, end_time = next(((start, end) for start, end in candidates if min_duration <= end - start <= max_duration),
+                                    (segment['start'], segment['end']))
+        if (start_time, end_time) != (segment['start'], segment['end']):
+            logging.info(f"Segmento ajustado aos cortes de cena: {segment['start']:.2f}-{segment['end']:.2f}s -> "
+                         f"{start_time:.2f}-{end_time:.2f}s")
+        snapped_segments.append({**segment, 'start': start_time, 'end': end_time})
+    return snapped_segments
+
+def profile_crop_size(profile, frame_width, frame_height):
+    """Maior janela com a proporção do perfil que cabe no frame, com dimensões pares (exigidas pelo x264)."""
+    crop_width = min(frame_width, frame_height * profile['width'] / profile['height'])
+    crop_height = crop_width * profile['height'] / profile['width']
+    return int(crop_width) // 2 * 2, int(crop_height) // 2 * 2
+
+def profile_crop_filter(profile, focus):
+    """
+    Filtro de crop do perfil: acompanha o foco do clipe ('focus'), recorta o centro ('center')
+    ou mantém o quadro inteiro ('full', retorna None). Sem foco calculado, 'focus' usa o centro.
+    """
+    if profile['crop'] == 'full':
+        return None
+    if profile['crop'] == 'focus' and focus is not None:
+        _, (frame_width, frame_height) = focus
+        return crop_filter(focus_to_crop_path(focus, *profile_crop_size(profile, frame_width, frame_height)))
+    ratio = profile['width'] / profile['height']
+    return f"crop='trunc(min(iw,ih*{ratio:.6f})/2)*2':'trunc(min(ih,iw/{ratio:.6f})/2)*2'"
+
+def encoder_settings(profile):
+    """Opções de codificação do perfil: os valores de encoder no config.json, sobrescritos pelos do perfil."""
+    return {key: profile.get(key, value) for key, value in encoder_config.items()}
+
+def encoder_threads(concurrent_encodes, concurrent_jobs=1):
+    """
+    Threads de cada processo do FFmpeg, dividindo o orçamento encoder.threads (0 usa todos os núcleos)
+    entre as codificações simultâneas: as deste job (concurrent_encodes) e as dos jobs que podem estar
+    renderizando ao mesmo tempo (concurrent_jobs, informado por quem executa os jobs).
+    """
+    budget = encoder_config['threads'] or os.cpu_count() or 1
+    return max(1, budget // (max(concurrent_encodes, 1) * max(concurrent_jobs, 1)))
+
+def encoder_options(encoder):
+    """Opções de vídeo do x264 para o FFmpeg: preset, CRF (ou bitrate fixo, se configurado) e tune."""
+    options = ['-c:v', 'libx264', '-preset', encoder['preset'], '-pix_fmt', 'yuv420p']
+    if encoder['video_bitrate']:
+        options += ['-b:v', encoder['video_bitrate'], '-maxrate', encoder['video_bitrate'],
+                    '-bufsize', encoder['video_bitrate']]
+    else:
+        options += ['-crf', str(encoder['crf'])]
+    if encoder['tune']:
+        options += ['-tune', encoder['tune']]
+    return options
 
-        except Exception as e:
-            logging.error(f"Erro ao salvar o clipe {clip_filename}: {e}")
+def build_render_command(video_path, start_time, end_time, crop, subtitle_path, output_path,
+                         profile=None, threads=None, fade_duration=0.5):
+    """
+    Monta o comando FFmpeg que renderiza um clipe em uma única passada:
+    seek, crop (filtro pronto, ou None para o quadro inteiro), redimensionamento para a resolução
+    do perfil de saída, fades, legendas e as opções de codificação (encoder + perfil).
+    Sem bitrate de vídeo, a qualidade é controlada pelo CRF. threads limita as threads do FFmpeg.
+    """
+    profile = profile or render_profiles[default_formats[0]]
+    encoder = encoder_settings(profile)
+    width, height = profile['width'], profile['height']
+    duration = end_time - start_time
+    filters = [crop] if crop else []
+    filters += [
+        f"scale={width}:{height}:force_original_aspect_ratio=decrease",
+        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2",
+        "setsar=1",
+        f"fade=t=in:st=0:d={fade_duration}",
+        f"fade=t=out:st={max(duration - fade_duration, 0):.3f}:d={fade_duration}",
+        subtitle_filter(subtitle_path),
+    ]
+    command = [
+        'ffmpeg',
+        '-y',
+        '-nostdin',  # Não consumir a entrada padrão (modo --serve e renderizações em paralelo)
+        '-ss', f"{start_time:.3f}",  # Seek na entrada: os timestamps do clipe começam em zero
+        '-t', f"{duration:.3f}",
+        '-i', str(video_path),
+        '-vf', ','.join(filters),
+    ] + encoder_options(encoder)
+    if threads:
+        command += ['-threads', str(threads)]
+    return command + ['-c:a', 'aac', '-b:a', encoder['audio_bitrate'], str(output_path)]
+
+def render_clip(video_path, start_time, end_time, crop, subtitle_path, output_path, profile=None, threads=None):
+    """Renderiza o clipe final com crop, fades e legendas em um único processo do FFmpeg."""
+    command = build_render_command(video_path, start_time, end_time, crop, subtitle_path, output_path,
+                                   profile, threads)
+    with measure_stage('encode', 1):
+        subprocess.run(command, check=True)
+    logging.info(f"Clipe renderizado em passada única: {output_path}")
 
-    return clips_saved
+def save_clip(video_path, segment, index, focus, formats, clip_subfolder, unique_id, video_name,
+              source_segments=None, job_checkpoint_dir=None, threads=None):
+    """
+    Gera as legendas uma única vez e renderiza o clipe em cada perfil de saída de formats, a partir
+    do foco já calculado. Retorna {perfil: caminho do clipe}; um erro fica isolado no perfil em que ocorreu.
+    Com job_checkpoint_dir, cada clipe concluído é registrado no manifesto do job.
+    """
+    start_time = segment['start']
+    end_time = segment['end']
+    clip_filename = f"{video_name}_{unique_id}_{index}.mp4"  # Nome do clipe
+
+    try:
+        # Gerar as legendas antes da renderização, já com tempos relativos ao clipe
+        if retranscribe_clips or source_segments is None:
+            clip_segments = transcribe_audio(load_audio(video_path, start_time, end_time))
+        else:
+            clip_segments = slice_transcript(source_segments, start_time, end_time)
+        subtitle_chunks = split_transcript_into_segments(clip_segments)
+    except Exception as e:
+        logging.error(f"Erro ao gerar as legendas do clipe {clip_filename}: {e}")
+        return {}
+
+    if focus is None and any(render_profiles[name]['crop'] == 'focus' for name in formats):
+        logging.warning(f"Foco do clipe {clip_filename} não calculado, usando o crop central")
 
-def clean_up_audio_files():
-    """Remove todos os arquivos de áudio após o término do processo, incluindo temporários."""
-    logging.info("Removendo arquivos de áudio...")
-    for audio_file in AUDIO_DIR.glob('*'):
+    clip_paths = {}
+    for profile_name in formats:
+        profile = render_profiles[profile_name]
+        clip_path = clip_subfolder / profile_name / clip_filename
+        subtitle_path = SUBTITLE_DIR / f"{video_name}_{unique_id}" / profile_name / f"{video_name}_{unique_id}_{index}.ass"
         try:
-            audio_file.unlink()
-            logging.info(f"Arquivo de áudio removido: {audio_file}")
+            clip_path.parent.mkdir(parents=True, exist_ok=True)
+            subtitle_path = write_clip_subtitles(subtitle_chunks, subtitle_path, profile['subtitle_style'])
+
+            # Renderizar crop, transições suaves e legendas em uma única codificação
+            render_clip(video_path, start_time, end_time, profile_crop_filter(profile, focus),
+                        subtitle_path, clip_path, profile, threads)
+            if job_checkpoint_dir is not None:
+                mark_clip_done(job_checkpoint_dir, clip_key(profile_name, index), clip_path)
+            logging.info(f"Clip salvo ({profile_name}): {clip_path}")
+            clip_paths[profile_name] = clip_path
         except Exception as e:
-            logging.error(f"Erro ao remover o arquivo de áudio {audio_file}: {e}")
+            logging.error(f"Erro ao salvar o clipe {clip_filename} ({profile_name}): {e}")
+    return clip_paths
+
+def save_clips(video_path, selected_segments, unique_id, video_name, source_segments=None, scene_cuts=(),
+               job_checkpoint_dir=None, formats=None, concurrent_jobs=1):
+    """
+    Salva os clipes selecionados em uma nova pasta, com uma subpasta por perfil de saída (formats,
+    por padrão output_formats.default). Transcrição, pontuação e análise de cena/foco são
+    compartilhadas: só a codificação final muda de um perfil para outro.
+    Com source_segments, as legendas de cada clipe saem da transcrição original; sem eles
+    (ou com retranscribe_clips ativo no config.json), o trecho é transcrito novamente.
+    Os clipes são renderizados em paralelo (render.workers), mantendo a ordem dos segmentos.
+    Com scene_cuts, o enquadramento é recalculado a cada tomada.
+    Com job_checkpoint_dir, os clipes já registrados no manifesto do job não são renderizados de novo.
+    concurrent_jobs é o número de jobs renderizando ao mesmo tempo, usado para dividir as threads do FFmpeg.
+    """
+    formats = formats or default_formats
+    clip_subfolder = CLIPS_DIR / f"{video_name}_{unique_id}" 
+    clip_subfolder.mkdir(parents=True, exist_ok=True)
+
+    done = completed_clips(job_checkpoint_dir) if job_checkpoint_dir is not None else {}
+    pending = {}
+    for i in range(len(selected_segments)):
+        pending_formats = [name for name in formats if clip_key(name, i + 1) not in done]
+        if pending_formats:
+            pending[i] = pending_formats
+    if done:
+        logging.info(f"Retomando job: {len(done)} clipes já concluídos, {len(pending)} segmentos pendentes")
+
+    # Calcular o foco de cada clipe pendente, abrindo o vídeo uma única vez, se algum perfil usar o foco
+    if any(render_profiles[name]['crop'] == 'focus' for name in formats):
+        focuses = compute_clip_focus(video_path, [selected_segments[i] for i in pending], scene_cuts)
+    else:
+        focuses = [None] * len(pending)
+
+    workers = min(render_workers or os.cpu_count() or 1, max(len(pending), 1))
+    threads = encoder_threads(workers, concurrent_jobs)
+    logging.info(f"Renderizando {len(pending)} clipes em {len(formats)} formato(s) com {workers} worker(s), "
+                 f"{threads} thread(s) do FFmpeg cada")
+
+    # Cada clipe é um processo do FFmpeg; as threads apenas despacham e aguardam a codificação
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            i: executor.submit(save_clip, video_path, selected_segments[i], i + 1, focus, pending[i],
+                               clip_subfolder, unique_id, video_name, source_segments, job_checkpoint_dir, threads)
+            for i, focus in zip(pending, focuses)
+        }
+        results = []
+        for i in range(len(selected_segments)):
+            rendered = futures[i].result() if i in futures else {}
+            for name in formats:
+                key = clip_key(name, i + 1)
+                clip_path = Path(done[key]) if key in done else rendered.get(name)
+                if clip_path is not None:
+                    results.append(clip_path)
+
+    return results
 
 def split_transcript_into_segments(segments):
-    """Divide a transcrição em segmentos respeitando o tempo."""
+    """
+    Divide a transcrição em blocos de legenda de até max_words_per_segment palavras, com os tempos
+    reais das palavras. Uma pausa maior que subtitles.max_pause_seconds também inicia um novo bloco.
+    """
     divided_segments = []
     
     for segment in segments:
-        text = segment["text"].strip()
-        words = text.split()
-        start_time = segment["start"]
-        end_time = segment["end"]
-        for i in range(0, len(words), max_words_per_segment):
-            chunk_words = words[i:i + max_words_per_segment]
-            chunk_text = ' '.join(chunk_words)
-            
-            chunk_start = start_time + (i / len(words)) * (end_time - start_time)
-            chunk_end = start_time + ((i + len(chunk_words)) / len(words)) * (end_time - start_time)
-            
+        words, starts, ends = segment_word_times(segment)
+        chunk_start = 0
+        for i in range(1, len(words) + 1):
+            if (i < len(words) and i - chunk_start < max_words_per_segment
+                    and starts[i] - ends[i - 1] <= subtitle_max_pause):
+                continue
             divided_segments.append({
-                "start": chunk_start,
-                "end": chunk_end,
-                "text": chunk_text
+                "start": starts[chunk_start],
+                "end": ends[i - 1],
+                "text": ' '.join(words[chunk_start:i])
             })
+            chunk_start = i
     
     return divided_segments
 
@@ -499,46 +1563,260 @@ def generate_srt(segments, srt_output_path):
     logging.info(f"Arquivo SRT salvo em: {srt_output_path}")
     return srt_output_path
 
-def generate_srt_from_video(video_path, srt_output_path):
-    """Gera um arquivo SRT a partir de um vídeo."""
-    if video_path is not None:
-        audio_output_path = video_path.replace('.mp4', '.mp3')
-    else:
-        logging.error("O caminho do vídeo é None.")
-    audio_output_path = video_path.replace('.mp4', '.mp3')
-    extract_audio(video_path, audio_output_path)
-    transcript_segments = transcribe_audio(audio_output_path)
-    segments = split_transcript_into_segments(transcript_segments)
-    srt_output_path = generate_srt(segments, srt_output_path)
-
-    if os.path.exists(audio_output_path):
-        os.remove(audio_output_path)
-
-    return srt_output_path
+def slice_transcript(segments, clip_start, clip_end):
+    """
+    Recorta as palavras da transcrição original no intervalo do clipe, com tempos relativos ao início do clipe.
+    Cada segmento recortado mantém os tempos por palavra, para a divisão das legendas.
+    """
+    clip_segments = []
 
-def process_video(video_path):
-    """Processa o vídeo completo, extraindo o áudio, transcrevendo, selecionando e salvando clipes."""  
-    audio_output_path = AUDIO_DIR / f"{Path(video_path).stem}.mp3"
-    unique_id = generate_unique_id()  # Gera um ID único
+    for segment in segments:
+        if segment['end'] <= clip_start or segment['start'] >= clip_end:
+            continue
+
+        words, starts, ends = segment_word_times(segment)
+        kept = [i for i in range(len(words)) if clip_start <= (starts[i] + ends[i]) / 2 < clip_end]
+        if not kept:
+            continue
+
+        # As palavras mantidas são contíguas: o recorte é uma fatia das listas paralelas
+        first, last = kept[0], kept[-1] + 1
+        word_starts = [max(t, clip_start) - clip_start for t in starts[first:last]]
+        word_ends = [min(t, clip_end) - clip_start for t in ends[first:last]]
+        clip_segments.append({
+            "start": word_starts[0],
+            "end": word_ends[-1],
+            "text": ' '.join(words[first:last]),
+            "words": words[first:last],
+            "word_starts": word_starts,
+            "word_ends": word_ends
+        })
+
+    return clip_segments
+
+def create_job(video_path, job_id=None, formats=None, concurrent_jobs=1):
+    """
+    Cria o estado de um job de processamento: ID, nome do vídeo, pasta de checkpoints
+    e perfis de saída (formats, por padrão output_formats.default).
+    Informar o job_id de um job anterior do mesmo vídeo retoma o processamento de onde ele parou.
+    concurrent_jobs é quantos jobs quem chama pode renderizar ao mesmo tempo (1 para um job isolado).
+    """
+    formats = list(formats or default_formats)
+    unknown = [name for name in formats if name not in render_profiles]
+    if unknown:
+        raise ValueError(f"Formato de saída desconhecido: {', '.join(unknown)}")
+    unique_id = job_id or generate_unique_id()  # Gera um ID único
     video_name = os.path.splitext(os.path.basename(video_path))[0]
+    logging.info(f"Job {unique_id} para o vídeo {video_path}")
+    return {
+        'video_path': str(video_path),
+        'unique_id': unique_id,
+        'video_name': video_name,
+        'checkpoint_dir': checkpoint_dir(CHECKPOINTS_DIR, f"{video_name}_{unique_id}"),
+        'formats': formats,
+        'concurrent_jobs': concurrent_jobs,
+        'segments': [],
+        'selected_segments': [],
+        'scene_cuts': [],
+        'clips_saved': [],
+        'error': None,
+        'started': time.perf_counter()
+    }
 
+def analyze_video(job):
+    """
+    Etapa de análise do job: transcrição, seleção dos segmentos e cortes de cena.
+    As legendas de cada clipe são geradas na renderização, em um único arquivo por clipe.
+    A saída de cada etapa é salva no checkpoint do job e reaproveitada quando o job é retomado.
+    """
     try:
-        extract_audio(video_path, audio_output_path)
-        segments = transcribe_audio(str(audio_output_path))
-        selected_segments = select_best_segments(segments, min_sent_score)
+        segments = load_stage(job['checkpoint_dir'], 'transcript')
+        if segments is None:
+            segments = transcribe_video(job['video_path'])
+            save_stage(job['checkpoint_dir'], 'transcript', segments)
+
+        selection = load_stage(job['checkpoint_dir'], 'selection')
+        if selection is None:
+            selected_segments = select_best_segments(segments, min_sent_score)
+            save_stage(job['checkpoint_dir'], 'scored', segments)
+
+            # Ajustar os limites dos clipes aos cortes de cena
+            scene_cuts = []
+            if selected_segments and scene_detection_config['enabled']:
+                scene_cuts = load_scene_cuts(job['video_path'])
+                selected_segments = snap_to_scene_cuts(selected_segments, scene_cuts)
+            selection = {'segments': selected_segments, 'scene_cuts': scene_cuts}
+            save_stage(job['checkpoint_dir'], 'selection', selection)
+        else:
+            segments = load_stage(job['checkpoint_dir'], 'scored') or segments
+
+        job['segments'] = segments
+        job['selected_segments'] = selection['segments']
+        job['scene_cuts'] = selection['scene_cuts']
+    except Exception as e:
+        logging.error(f"Erro no processamento do vídeo: {e}")
+        job['error'] = str(e)
+    return job
 
-        if selected_segments:
-            save_subtitles(selected_segments, SUBTITLE_DIR, unique_id, video_name)
-            clips_saved = save_clips(video_path, selected_segments, unique_id, video_name)
+def render_video(job):
+    """Etapa de renderização do job: gera os clipes selecionados."""
+    try:
+        if job['selected_segments'] and not job['error']:
+            job['clips_saved'] = save_clips(job['video_path'], job['selected_segments'], job['unique_id'],
+                                            job['video_name'], job['segments'], job['scene_cuts'],
+                                            job['checkpoint_dir'], job['formats'], job['concurrent_jobs'])
             
             # Log resumido e final
-            logging.info(f"Processamento concluído: {len(selected_segments)} segmentos escolhidos, {len(clips_saved)} clipes salvos.")
+            logging.info(f"Processamento concluído: {len(job['selected_segments'])} segmentos escolhidos, {len(job['clips_saved'])} clipes salvos.")
     
     except Exception as e:
         logging.error(f"Erro no processamento do vídeo: {e}")
-    finally:
-        clean_up_audio_files()
+        job['error'] = str(e)
+    return job
+
+def process_video(video_path, job_id=None, formats=None):
+    """
+    Processa o vídeo completo, extraindo o áudio, transcrevendo, selecionando e salvando clipes
+    em cada perfil de saída de formats.
+    Com o job_id de uma execução anterior, retoma a partir da primeira etapa ou clipe incompleto.
+    """  
+    job = analyze_video(create_job(video_path, job_id, formats))
+    return render_video(job)['clips_saved']
+
+def probe_duration(video_path):
+    """Retorna a duração do vídeo em segundos usando o ffprobe."""
+    result = subprocess.run(
+        ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+         '-of', 'default=noprint_wrappers=1:nokey=1', str(video_path)],
+        capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.strip())
+
+def collect_video_paths(paths):
+    """Expande diretórios em seus arquivos de vídeo (.mp4/.mov), mantendo a ordem recebida."""
+    video_paths = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            video_paths.extend(sorted(p for p in path.iterdir() if p.suffix.lower() in VIDEO_EXTENSIONS))
+        else:
+            video_paths.append(path)
+    return video_paths
+
+def report_throughput(job):
+    """Registra o throughput do job (tempo de processamento x duração do vídeo) e atualiza o relatório da execução."""
+    video_path = job['video_path']
+    elapsed = time.perf_counter() - job['started']
+
+    duration = None
+    try:
+        duration = probe_duration(video_path)
+        speed = f"{duration:.1f}s de vídeo, {duration / elapsed:.2f}x tempo real"
+    except (subprocess.CalledProcessError, ValueError, OSError):
+        speed = "duração desconhecida"
+
+    # O relatório é regravado a cada job, para ficar atualizado também no modo --serve
+    record_job(job, elapsed, duration)
+    write_run_report()
+
+    message = f"Vídeo processado: {video_path} | job {job['unique_id']} | {elapsed:.1f}s | {speed} | {len(job['clips_saved'])} clipes"
+    logging.info(message)
+    print(message, flush=True)
+
+# Marca de fim de fila para os workers do pipeline
+_STOP = object()
+
+def _stage_worker(stage, input_queue, output_queue=None):
+    """Consome jobs de uma fila, executa a etapa e repassa o resultado para a próxima fila."""
+    while True:
+        item = input_queue.get()
+        if item is _STOP:
+            break
+        try:
+            job = stage(item)
+        except Exception as e:
+            # Um erro inesperado descarta apenas este item, sem derrubar o worker
+            logging.error(f"Erro na etapa {threading.current_thread().name}: {e}")
+            continue
+        if output_queue is not None:
+            output_queue.put(job)  # Bloqueia quando a próxima etapa está atrasada
+
+def run_pipeline(video_paths, formats=None):
+    """
+    Processa uma sequência de vídeos em etapas paralelas ligadas por filas limitadas:
+    enquanto os clipes do vídeo N são renderizados, o vídeo N+1 já está sendo transcrito e analisado.
+    A concorrência de cada etapa e o tamanho das filas vêm de pipeline no config.json.
+    video_paths pode ser qualquer iterável (por exemplo, a entrada padrão no modo --serve).
+    Todos os vídeos são renderizados nos perfis de saída de formats.
+    """
+    analysis_queue = queue.Queue(maxsize=pipeline_config['queue_size'])
+    render_queue = queue.Queue(maxsize=pipeline_config['queue_size'])
+
+    def analyze_stage(video_path):
+        return analyze_video(create_job(video_path, formats=formats,
+                                        concurrent_jobs=pipeline_config['render_workers']))
+
+    def render_stage(job):
+        render_video(job)
+        report_throughput(job)
+
+    analysis_threads = [
+        threading.Thread(target=_stage_worker, args=(analyze_stage, analysis_queue, render_queue),
+                         name=f"analise-{i + 1}", daemon=True)
+        for i in range(pipeline_config['analysis_workers'])
+    ]
+    render_threads = [
+        threading.Thread(target=_stage_worker, args=(render_stage, render_queue),
+                         name=f"render-{i + 1}", daemon=True)
+        for i in range(pipeline_config['render_workers'])
+    ]
+    for thread in analysis_threads + render_threads:
+        thread.start()
+
+    for path in video_paths:
+        for video_path in collect_video_paths([path]):
+            analysis_queue.put(str(video_path))
+
+    for _ in analysis_threads:
+        analysis_queue.put(_STOP)
+    for thread in analysis_threads:
+        thread.join()
+    for _ in render_threads:
+        render_queue.put(_STOP)
+    for thread in render_threads:
+        thread.join()
+
+def process_videos(video_paths, formats=None):
+    """Processa uma lista de vídeos no mesmo processo, reaproveitando os modelos já carregados."""
+    run_pipeline(video_paths, formats)
+
+def serve(formats=None):
+    """Modo servidor: lê caminhos de vídeo da entrada padrão, um por linha, com os modelos sempre carregados."""
+    logging.info("Modo servidor iniciado, aguardando caminhos de vídeo na entrada padrão.")
+    print("Pronto. Informe um caminho de vídeo (ou diretório) por linha.", flush=True)
+    run_pipeline((line.strip() for line in sys.stdin if line.strip()), formats)
+
+def parse_args(argv=None):
+    """Lê os argumentos de linha de comando."""
+    parser = argparse.ArgumentParser(description="Gera cortes legendados a partir de vídeos.")
+    parser.add_argument('videos', nargs='*', help="Vídeos ou diretórios de vídeos a processar, em ordem.")
+    parser.add_argument('--serve', action='store_true',
+                        help="Mantém os modelos carregados e lê caminhos de vídeo da entrada padrão.")
+    parser.add_argument('--formats', nargs='+', choices=sorted(render_profiles), default=default_formats,
+                        help="Perfis de saída (output_formats.profiles) renderizados a partir da mesma análise.")
+    parser.add_argument('--job-id',
+                        help="Retoma (ou cria) o job com este ID, reaproveitando os checkpoints salvos.")
+    args = parser.parse_args(argv)
+    if not args.videos and not args.serve:
+        parser.error("informe ao menos um vídeo ou use --serve")
+    if args.job_id and (len(args.videos) != 1 or args.serve):
+        parser.error("--job-id exige exatamente um vídeo e não pode ser usado com --serve")
+    return args
 
 if __name__ == "__main__":
-    video_file_path = sys.argv[1]
-    process_video(video_file_path)
\ No newline at end of file
+    args = parse_args()
+    if args.job_id:
+        report_throughput(render_video(analyze_video(create_job(args.videos[0], args.job_id, args.formats))))
+    else:
+        process_videos(args.videos, args.formats)
+    if args.serve:
+        serve(args.formats)
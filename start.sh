@@ -50,15 +50,7 @@ if [ ${#VIDEOS[@]} -eq 0 ]; then
     exit 1
 fi
 
-# Loop para processar todos os arquivos de vídeo no diretório
-for VIDEO_PATH in "${VIDEOS[@]}"; do
-    # Verifica se o arquivo é um arquivo regular e se é um vídeo
-    if [ -f "$VIDEO_PATH" ]; then
-        echo "Processando vídeo: $VIDEO_PATH"
-        
-        # Chama o script Python com o caminho do vídeo
-        python "$BASE_DIR/main.py" "$VIDEO_PATH"
-        
-        echo "Processamento concluído para o vídeo: $VIDEO_PATH"
-    fi
-done
\ No newline at end of file
+# Processa todos os vídeos em um único processo, carregando os modelos apenas uma vez
+echo "Processando ${#VIDEOS[@]} vídeo(s) em: $VIDEOS_DIR"
+python "$BASE_DIR/main.py" "${VIDEOS[@]}"
+echo "Processamento concluído para todos os vídeos."
\ No newline at end of file